@@ -0,0 +1,132 @@
+"""JWT-аутентификация без запроса пользователя на каждый запрос.
+
+В access-токен записываются `role` и `is_staff`. Для безопасных
+(читающих) запросов пользователь берётся из ограниченного кэша процесса,
+а если его там нет и токен выпущен не раньше `USER_CACHE_STALENESS`
+секунд назад — из утверждений токена. Запросы на запись всегда получают
+пользователя из БД.
+
+Кэш сбрасывается при изменении и удалении пользователя, поэтому смена
+роли через `UserView` применяется сразу в этом процессе и не позже чем
+через `USER_CACHE_STALENESS` секунд в остальных.
+"""
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import ADMIN, MODERATOR
+from .cache import LocMemLRUCache
+
+DEFAULT_USER_CACHE_STALENESS = 60
+DEFAULT_USER_CACHE_MAX_ENTRIES = 10000
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['role'] = user.role
+        token['is_staff'] = user.is_staff
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """Пользователь, построенный по утверждениям токена.
+
+    Роль и флаги берутся из токена; при обращении к остальным полям
+    (email, bio и т. д.) пользователь один раз загружается из БД.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    def is_admin(self):
+        return self.role == ADMIN or self.is_staff
+
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+    @cached_property
+    def user(self):
+        return get_user_model().objects.get(pk=self.pk)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+def get_staleness():
+    return getattr(
+        settings, 'USER_CACHE_STALENESS', DEFAULT_USER_CACHE_STALENESS
+    )
+
+
+@lru_cache(maxsize=None)
+def get_user_cache():
+    return LocMemLRUCache(
+        MAX_ENTRIES=getattr(
+            settings, 'USER_CACHE_MAX_ENTRIES', DEFAULT_USER_CACHE_MAX_ENTRIES
+        ),
+        TIMEOUT=get_staleness()
+    )
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    if setting in ('USER_CACHE_STALENESS', 'USER_CACHE_MAX_ENTRIES'):
+        get_user_cache.cache_clear()
+
+
+def invalidate_user(user_id):
+    get_user_cache().delete(user_id)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, обслуживающая чтение без запроса к таблице users."""
+
+    def authenticate(self, request):
+        self.safe_request = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        if not self.safe_request:
+            return super().get_user(validated_token)
+        cache = get_user_cache()
+        user = cache.get(user_id)
+        if user is not None:
+            return user
+        if self.is_fresh(validated_token):
+            return RoleTokenUser(validated_token)
+        user = super().get_user(validated_token)
+        cache.set(user_id, user)
+        return user
+
+    def is_fresh(self, validated_token):
+        """Можно ли доверять роли из токена без проверки по БД."""
+        issued_at = validated_token.get('iat')
+        return (
+            'role' in validated_token
+            and issued_at is not None
+            and time.time() - issued_at <= get_staleness()
+        )
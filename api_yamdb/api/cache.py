@@ -0,0 +1,258 @@
+"""Кэш ответов для чтения произведений.
+
+Ключ ответа строится из версии данных и нормализованных параметров
+запроса. Версия увеличивается при любой записи в Title, Genre, Category
+и Review, поэтому устаревшие ответы просто перестают находиться в кэше
+и со временем вытесняются.
+
+Бэкенд задаётся настройкой `TITLES_CACHE`:
+
+    TITLES_CACHE = {
+        'BACKEND': 'api.cache.LocMemLRUCache',
+        'OPTIONS': {'MAX_ENTRIES': 1024, 'MAX_SIZE': 32 * 1024 * 1024},
+    }
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.response import Response
+
+
+DEFAULT_TITLES_CACHE = {
+    'BACKEND': 'api.cache.LocMemLRUCache',
+    'OPTIONS': {},
+}
+
+
+class BaseResponseCache:
+    """Интерфейс бэкенда кэша ответов."""
+
+    def __init__(self, **options):
+        self.timeout = options.get('TIMEOUT')
+
+    def get(self, key):
+        """Вернуть закэшированное значение или None."""
+        raise NotImplementedError
+
+    def set(self, key, value, timeout=None):
+        """Сохранить значение; `timeout` заменяет `TIMEOUT` бэкенда."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def get_version(self):
+        raise NotImplementedError
+
+    def bump_version(self):
+        """Сделать недействительными все ранее сохранённые ответы."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class LocMemLRUCache(BaseResponseCache):
+    """Кэш в памяти процесса с вытеснением давно не используемых записей.
+
+    Размер ограничен числом записей и суммарным объёмом сериализованных
+    значений. Версия хранится в процессе, поэтому при нескольких
+    процессах-воркерах устаревание других процессов ограничено `TIMEOUT`.
+    """
+
+    def __init__(self, **options):
+        options.setdefault('TIMEOUT', 60)
+        super().__init__(**options)
+        self.max_entries = options.get('MAX_ENTRIES', 1024)
+        self.max_size = options.get('MAX_SIZE', 32 * 1024 * 1024)
+        self._data = OrderedDict()
+        self._size = 0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, payload = entry
+            if expires is not None and expires < time.monotonic():
+                self._delete(key)
+                return None
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout=None):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_size:
+            return
+        if timeout is None:
+            timeout = self.timeout
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._delete(key)
+            self._data[key] = (expires, payload)
+            self._size += len(payload)
+            while (
+                len(self._data) > self.max_entries
+                or self._size > self.max_size
+            ):
+                self._delete(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def get_version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+
+class DjangoCacheBackend(BaseResponseCache):
+    """Кэш поверх `django.core.cache`, общий для всех процессов.
+
+    Подходит для Redis или Memcached: версия хранится в том же кэше
+    и видна всем воркерам.
+    """
+
+    version_key = 'titles-cache-version'
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.cache = caches[options.get('ALIAS', 'default')]
+        self.key_prefix = options.get('KEY_PREFIX', 'titles')
+
+    def get(self, key):
+        return self.cache.get(f'{self.key_prefix}:{key}')
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(
+            f'{self.key_prefix}:{key}', value,
+            self.timeout if timeout is None else timeout
+        )
+
+    def delete(self, key):
+        self.cache.delete(f'{self.key_prefix}:{key}')
+
+    def get_version(self):
+        return self.cache.get_or_set(self.version_key, 0, None)
+
+    def bump_version(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, 1, None)
+
+    def clear(self):
+        self.bump_version()
+
+
+@lru_cache(maxsize=None)
+def get_response_cache():
+    """Экземпляр бэкенда, заданного настройкой `TITLES_CACHE`."""
+    config = getattr(settings, 'TITLES_CACHE', DEFAULT_TITLES_CACHE)
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    if setting == 'TITLES_CACHE':
+        get_response_cache.cache_clear()
+
+
+def invalidate_titles_cache():
+    get_response_cache().bump_version()
+
+
+DEFAULT_RECOMMENDATIONS_CACHE_TIMEOUT = 600
+
+
+def recommendations_key(user_id):
+    """Ключ рекомендаций пользователя.
+
+    Не зависит от версии кэша: рекомендации сбрасываются отзывами самого
+    пользователя, а пересчёт похожих произведений и изменения самих
+    произведений учитываются по истечении `recommendations_timeout()`.
+    """
+    return repr(('recommendations', user_id))
+
+
+def recommendations_timeout():
+    """Срок хранения рекомендаций, даже если `TIMEOUT` бэкенда — None."""
+    return getattr(
+        settings, 'RECOMMENDATIONS_CACHE_TIMEOUT',
+        DEFAULT_RECOMMENDATIONS_CACHE_TIMEOUT
+    )
+
+
+def invalidate_recommendations(user_id):
+    get_response_cache().delete(recommendations_key(user_id))
+
+
+def normalize_query_params(query_params):
+    """Параметры запроса в каноническом виде, без пустых значений."""
+    return tuple(sorted(
+        (key, tuple(sorted(value for value in values if value != '')))
+        for key, values in query_params.lists()
+        if any(value != '' for value in values)
+    ))
+
+
+class CachedResponseMixin:
+    """Кэширует ответы `list` и `retrieve` вьюсета."""
+
+    cached_actions = ('list', 'retrieve')
+
+    def get_cache_key(self, request):
+        cache = get_response_cache()
+        return repr((
+            cache.get_version(),
+            self.basename,
+            self.action,
+            tuple(sorted(self.kwargs.items())),
+            normalize_query_params(request.query_params),
+        ))
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        cache = get_response_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
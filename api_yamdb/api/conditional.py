@@ -0,0 +1,109 @@
+"""Условные GET-запросы: ETag, Last-Modified и Cache-Control.
+
+ETag и Last-Modified строятся по версии коллекции из `reviews.stamps`,
+а не по телу ответа, поэтому на `If-None-Match` и `If-Modified-Since`
+вьюсет отвечает 304 одним запросом к таблице версий, не выполняя
+запрос списка.
+
+Ответы анонимным клиентам помечаются как `public` и могут храниться
+общим HTTP-кэшем; ответы с заголовком Authorization — `private`.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+from reviews.stamps import get_stamp
+from .cache import normalize_query_params
+
+DEFAULT_API_CACHE_MAX_AGE = 0
+
+
+class NotModified(Exception):
+    """Прерывает обработку запроса готовым ответом 304."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """Поддержка условных запросов для `list` и `retrieve` вьюсета.
+
+    Коллекция задаётся `stamp_key` или методом `get_stamp_key`,
+    её объекты — `get_stamp_queryset` (нужны для первой версии).
+    """
+
+    conditional_actions = ('list', 'retrieve')
+    stamp_key = None
+
+    def get_stamp_key(self):
+        return self.stamp_key
+
+    def get_stamp_queryset(self):
+        return self.queryset
+
+    def get_stamp(self):
+        return get_stamp(self.get_stamp_key(), self.get_stamp_queryset())
+
+    def get_etag(self, request, stamp):
+        """Сильный ETag: версия коллекции и всё, от чего зависит ответ."""
+        return quote_etag(hashlib.sha1(repr((
+            stamp.key,
+            stamp.version,
+            stamp.updated_at.isoformat(),
+            self.action,
+            tuple(sorted(self.kwargs.items())),
+            normalize_query_params(request.query_params),
+            request.accepted_media_type,
+        )).encode()).hexdigest())
+
+    def is_conditional(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and self.action in self.conditional_actions
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if not self.is_conditional(request):
+            return
+        stamp = self.get_stamp()
+        self.etag = self.get_etag(request, stamp)
+        self.last_modified = int(stamp.updated_at.timestamp())
+        response = get_conditional_response(
+            request._request,
+            etag=self.etag,
+            last_modified=self.last_modified
+        )
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'etag', None) is None or response.status_code not in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            return response
+        response['ETag'] = self.etag
+        response['Last-Modified'] = http_date(self.last_modified)
+        if request.META.get('HTTP_AUTHORIZATION'):
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, public=True, max_age=getattr(
+                settings, 'API_CACHE_MAX_AGE', DEFAULT_API_CACHE_MAX_AGE
+            ))
+        patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,51 @@
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, загружаемых одним запросом `IN`."""
+
+    default_error_messages = {
+        'does_not_exist': 'Объекты с {slug_name}={values} не существуют.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = list(dict.fromkeys(data))
+        for slug in slugs:
+            if not isinstance(slug, str):
+                child.fail('invalid')
+        objects = {
+            str(getattr(obj, child.slug_field)): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': slugs}
+            )
+        }
+        missing = [slug for slug in slugs if slug not in objects]
+        if missing:
+            self.fail(
+                'does_not_exist',
+                slug_name=child.slug_field,
+                values=', '.join(missing)
+            )
+        return [objects[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который при many=True проверяет все slug сразу.
+
+    Вместо запроса на каждый slug выполняется один запрос `IN`,
+    а в ошибке перечисляются все несуществующие slug.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
@@ -1,26 +1,170 @@
 import django_filters
+from django import forms
+from django.db.models import Count
+from django_filters import utils
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter, SearchFilter
 
-from reviews.models import Title
+from reviews import bitmaps
+from reviews.models import Category, Title
+from reviews.search import get_search_backend
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Список значений через запятую."""
+
+
+class IntegerInFilter(django_filters.BaseInFilter, django_filters.Filter):
+    """Список целых чисел через запятую; дробные значения — ошибка."""
+
+    field_class = forms.IntegerField
 
 
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.CharFilter(
+    """Фильтры произведений.
+
+    Жанр, категория и диапазон лет по возможности проверяются по битовому
+    индексу (`reviews.bitmaps`) одним условием `id IN (...)`; без индекса
+    используются равнозначные условия SQL. Каждое из них читается
+    по индексу: диапазон лет — поиском по `title_year_idx`, списки
+    категорий и id — условием `IN`, а не соединениями через OR.
+    """
+
+    GENRE_MATCH_ANY = 'any'
+    GENRE_MATCH_ALL = 'all'
+    INDEXED_FILTERS = ('genre', 'genre_match', 'category', 'year_min',
+                       'year_max')
+
+    genre = CharInFilter(
         field_name='genre__slug',
         method='filter_genre'
     )
-    category = django_filters.CharFilter(
+    genre_match = django_filters.ChoiceFilter(
+        choices=[
+            (GENRE_MATCH_ANY, 'Любой из жанров'),
+            (GENRE_MATCH_ALL, 'Все жанры'),
+        ],
+        method='filter_genre_match'
+    )
+    category = CharInFilter(
         field_name='category__slug',
         method='filter_category'
     )
+    ids = IntegerInFilter(field_name='id', method='filter_ids')
+    year_min = django_filters.NumberFilter(
+        field_name='year', lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year', lookup_expr='lte'
+    )
+
+    def match_all_genres(self):
+        return self.form.cleaned_data.get(
+            'genre_match'
+        ) == self.GENRE_MATCH_ALL
 
     def filter_genre(self, titles, name, value):
-        """Фильтрация по slug жанра"""
-        return titles.filter(genre__slug=value)
+        """Фильтрация по slug жанров: любой из них или все сразу."""
+        genres = Title.genre.through.objects.filter(
+            genre__slug__in=value
+        ).values('title_id')
+        if self.match_all_genres():
+            genres = genres.annotate(
+                matched=Count('genre_id', distinct=True)
+            ).filter(matched=len(set(value))).values('title_id')
+        return titles.filter(id__in=genres)
+
+    def filter_genre_match(self, titles, name, value):
+        """Учитывается в `filter_genre`."""
+        return titles
 
     def filter_category(self, titles, name, value):
-        """Фильтрация по slug категории"""
-        return titles.filter(category__slug=value)
+        """Фильтрация по slug категорий: `category_id IN (...)`."""
+        return titles.filter(
+            category__in=Category.objects.filter(slug__in=value)
+        )
+
+    def filter_ids(self, titles, name, value):
+        """Выборка произведений по списку id."""
+        return titles.filter(bitmaps.id_filter(value))
+
+    # Множество найденных произведений, если все фильтры проверены
+    # по битовому индексу, иначе None.
+    matched_bits = None
+
+    def filter_queryset(self, queryset):
+        data = self.form.cleaned_data
+        if bitmaps.is_enabled() and any(
+            data.get(name) not in EMPTY_VALUES
+            for name in self.INDEXED_FILTERS
+        ):
+            index = bitmaps.get_title_index()
+            bits = index.match(
+                genres=data.get('genre'),
+                match_all_genres=self.match_all_genres(),
+                categories=data.get('category'),
+                year_min=data.get('year_min'),
+                year_max=data.get('year_max'),
+            )
+            if bits is not None:
+                queryset = queryset.filter(
+                    bitmaps.id_filter(bitmaps.to_ids(bits))
+                ) if bits else queryset.none()
+            data = {
+                name: value for name, value in data.items()
+                if name not in self.INDEXED_FILTERS
+            }
+            if all(value in EMPTY_VALUES for value in data.values()):
+                self.matched_bits = bits
+        for name, value in data.items():
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
 
     class Meta:
         model = Title
         fields = ['genre', 'category', 'name', 'year']
+
+
+class TitleFilterBackend(DjangoFilterBackend):
+    """Сохраняет набор фильтров во вьюсете как `filterset`."""
+
+    def filter_queryset(self, request, queryset, view):
+        filterset = self.get_filterset(request, queryset, view)
+        if filterset is None:
+            return queryset
+        if not filterset.is_valid() and self.raise_exception:
+            raise utils.translate_validation(filterset.errors)
+        view.filterset = filterset
+        return filterset.qs
+
+
+class TitleSearchFilter(SearchFilter):
+    """Полнотекстовый поиск по названию и описанию через поисковый индекс."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        return get_search_backend().search(queryset, query)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Сортировка произведений по одному полю с id для устойчивого порядка.
+
+    Для каждого поля из `ordering_fields` есть индекс `(поле, id)`,
+    поэтому в обоих направлениях строки читаются из индекса без
+    отдельной сортировки. Учитывается только первое допустимое поле
+    параметра `ordering`.
+    """
+
+    ordering_fields = ('rating', 'year', 'reviews_count', 'name')
+    tie_breaker = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or ordering == self.get_default_ordering(view):
+            return ordering
+        field = ordering[0]
+        direction = '-' if field.startswith('-') else ''
+        return (field, f'{direction}{self.tie_breaker}')
@@ -0,0 +1,142 @@
+from base64 import b64decode, b64encode
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination, CursorPagination, PageNumberPagination
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Пагинация по курсору в порядке `(-pub_date, id)`.
+
+    Страница выбирается условием по дате публикации, а не смещением,
+    поэтому любая страница стоит столько же, сколько первая. Общее
+    количество по умолчанию не считается: его можно запросить
+    параметром `count=true`.
+    """
+
+    ordering = ('-pub_date', 'id')
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in (
+            '1', 'true'
+        ):
+            self.count = self.get_count(queryset, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset, view):
+        """Количество объектов: из счётчика вьюсета, если он есть."""
+        get_count = getattr(view, 'get_pagination_count', None)
+        count = get_count() if get_count is not None else None
+        return queryset.count() if count is None else count
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = {'count': self.count, **response.data}
+        return response
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с переходом на курсор по запросу клиента.
+
+    Курсор включается параметром `pagination=cursor`; ссылки `next`
+    и `previous` курсорной страницы уже содержат `cursor`.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_pagination_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_class = self.cursor_pagination_class
+        if (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor_class.cursor_query_param in request.query_params
+        ):
+            self.cursor_paginator = cursor_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class ScoreCursorPagination(BasePagination):
+    """Курсорная пагинация по `(-score, <id_field>)`.
+
+    В курсор записываются вес и id последней строки страницы, поэтому
+    следующая страница начинается поиском по индексу, а не смещением.
+    Поддерживается только переход вперёд.
+    """
+
+    page_size = 10
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    id_field = 'title_id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            return min(
+                max(int(request.query_params[self.page_size_query_param]), 1),
+                self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            score, row_id = b64decode(encoded.encode()).decode().split(':')
+            return int(score), int(row_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, score, row_id):
+        return b64encode(f'{score}:{row_id}'.encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        queryset = queryset.order_by('-score', self.id_field)
+        if cursor is not None:
+            score, row_id = cursor
+            queryset = queryset.filter(score__lte=score).exclude(
+                score=score, **{f'{self.id_field}__lte': row_id}
+            )
+        page = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(
+                last.score, getattr(last, self.id_field)
+            )
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
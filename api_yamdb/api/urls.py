@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     TitleViewSet, GenreViewSet, signup, token,
-    CommentViewSet, ReviewViewSet, UserView, CategoryViewSet
+    CommentViewSet, ReviewViewSet, UserView, CategoryViewSet,
+    LeaderboardViewSet
 )
 
 
@@ -12,6 +13,7 @@ router_v1.register('users', UserView, basename='user')
 router_v1.register('titles', TitleViewSet, basename='title')
 router_v1.register('categories', CategoryViewSet, basename='category')
 router_v1.register('genres', GenreViewSet, basename='genre')
+router_v1.register('leaderboard', LeaderboardViewSet, basename='leaderboard')
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
@@ -1,21 +1,28 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, mixins, status, filters
 from rest_framework.response import Response
 from rest_framework.filters import SearchFilter
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action, api_view
 
-from reviews.models import Review, Title, Category, Genre
+from reviews import rankings, stamps
+from reviews.facets import FACETS, facet_counts
+from reviews.recommendations import recommend
+from reviews.statistics import title_statistics
+from reviews.models import (
+    RANKING_ALL_TIME, RANKING_GLOBAL_SCOPE, Comment, Review, SimilarTitle,
+    Title, TitleRanking, Category, Genre
+)
+from reviews.outbox import enqueue_email
 from .serializers import (
     CategorySerializer, GenreSerializer,
     TitleCreateUpdateSerializer, TitleReadSerializer,
@@ -25,7 +32,16 @@ from .serializers import (
 from .permissions import (
     AdminPermission, IsAuthorOrAdminOrModerator, ReadOnlyPermission
 )
-from .filters import TitleFilter
+from .filters import (
+    TitleFilter, TitleFilterBackend, TitleOrderingFilter, TitleSearchFilter
+)
+from .authentication import RoleAccessToken
+from .cache import (
+    CachedResponseMixin, get_response_cache, recommendations_key,
+    recommendations_timeout
+)
+from .conditional import ConditionalGetMixin
+from .pagination import OptionalCursorPagination, ScoreCursorPagination
 
 
 User = get_user_model()
@@ -57,6 +73,40 @@ class UserView(viewsets.ModelViewSet):
         serializer.save(role=user.role)
         return Response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path=f'{settings.USER_ME}/recommendations',
+        url_name=f'{settings.USER_ME}-recommendations',
+        permission_classes=(IsAuthenticated,)
+    )
+    def recommendations(self, request, *args, **kwargs):
+        """Непросмотренные произведения, похожие на оценённые.
+
+        Ответ кэшируется для пользователя до его следующего отзыва,
+        но не дольше `RECOMMENDATIONS_CACHE_TIMEOUT` секунд.
+        """
+        cache = get_response_cache()
+        key = recommendations_key(request.user.pk)
+        data = cache.get(key)
+        if data is None:
+            predicted = dict(recommend(request.user.pk))
+            titles = {
+                title['id']: title
+                for title in TitleReadSerializer.fast_data(list(
+                    TitleReadSerializer.fast_queryset(
+                        Title.objects.filter(id__in=predicted)
+                    )
+                ))
+            }
+            data = [
+                {**titles[title_id], 'predicted_score': round(score, 2)}
+                for title_id, score in predicted.items()
+                if title_id in titles
+            ]
+            cache.set(key, data, recommendations_timeout())
+        return Response(data)
+
 
 @api_view(['POST'])
 def signup(request):
@@ -81,7 +131,7 @@ def signup(request):
 
     confirmation_code = default_token_generator.make_token(user)
 
-    send_mail(
+    enqueue_email(
         'Код подтверждения',
         f'Ваш код подтверждения для получения токена: {confirmation_code},',
         from_email=settings.FROM_EMAIL,
@@ -112,30 +162,265 @@ def token(request):
         )
 
     return Response({
-        'token': AccessToken.for_user(user)
+        'token': RoleAccessToken.for_user(user)
     }, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class SparseQuerysetMixin:
+    """Параметр `fields`: ограничивает поля ответа и столбцы запроса.
+
+    `sparse_fields` сопоставляет полю сериализатора столбцы модели
+    для `only()`. Связи, столбцы которых не запрошены, не загружаются:
+    `select_related` сохраняется только для них, а `prefetch_related` —
+    только для запрошенных полей из `sparse_prefetch`. Параметр
+    учитывается лишь в читающих запросах.
+
+    Сужение выполняется в `filter_queryset`, поэтому действует и для
+    вьюсетов, переопределяющих `get_queryset`.
+    """
+
+    fields_query_param = 'fields'
+    sparse_fields = {}
+    sparse_base_columns = ('pk',)
+    sparse_prefetch = ()
+
+    @cached_property
+    def requested_fields(self):
+        """Запрошенные поля в порядке сериализатора или None."""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+        fields = {field.strip() for field in value.split(',')} - {''}
+        unknown = fields - set(self.sparse_fields)
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param:
+                    f'Неизвестные поля: {", ".join(sorted(unknown))}.'
+            })
+        return [field for field in self.sparse_fields if field in fields]
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.requested_fields
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields = self.requested_fields
+        if fields is None:
+            return queryset
+        columns = [*self.sparse_base_columns, *(
+            column for field in fields for column in self.sparse_fields[field]
+        )]
+        related = {
+            column.split('__')[0] for column in columns if '__' in column
+        }
+        queryset = queryset.select_related(None).prefetch_related(
+            None
+        ).prefetch_related(*(
+            field for field in fields if field in self.sparse_prefetch
+        ))
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+
+class TitleViewSet(SparseQuerysetMixin, ConditionalGetMixin,
+                   CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Title.objects.select_related(
         'category'
-    ).prefetch_related('genre').annotate(
-        rating=Avg('reviews__score')
-    ).order_by(*Title._meta.ordering)
+    ).prefetch_related('genre').order_by(*Title._meta.ordering)
     pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend, SearchFilter)
+    filter_backends = (
+        TitleFilterBackend, TitleSearchFilter, TitleOrderingFilter
+    )
     filterset_class = TitleFilter
-    search_fields = ['name']
+    search_fields = ['name', 'description']
+    ordering_fields = TitleOrderingFilter.ordering_fields
     permission_classes = (ReadOnlyPermission | AdminPermission,)
     http_method_names = ['get', 'post', 'patch', 'delete']
+    # Те же столбцы читает быстрый путь сериализатора; id входит
+    # в `sparse_base_columns`.
+    sparse_fields = TitleReadSerializer.fast_columns
+    sparse_prefetch = ('genre',)
+    stamp_key = stamps.TITLES
+    conditional_actions = ('list', 'retrieve', 'statistics')
+    cached_actions = ('list', 'retrieve', 'statistics')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return TitleCreateUpdateSerializer
         return TitleReadSerializer
 
+    def get_stamp(self):
+        """Версия коллекции хранится в кэше ответов рядом с ответами.
+
+        Кэш сбрасывается теми же изменениями, что и версия, поэтому
+        ответ из кэша, в том числе 304, не требует запросов к БД.
+        """
+        cache = get_response_cache()
+        key = repr((cache.get_version(), 'stamp', self.stamp_key))
+        stamp = cache.get(key)
+        if stamp is None:
+            stamp = super().get_stamp()
+            cache.set(key, stamp)
+        return stamp
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self.fast_list, request, *args, **kwargs)
+
+    def fast_list(self, request, *args, **kwargs):
+        """Список произведений через быстрый путь TitleReadSerializer."""
+        fields = self.requested_fields
+        facets = self.requested_facets
+        titles = self.filter_queryset(self.get_queryset())
+        queryset = TitleReadSerializer.fast_queryset(titles, fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(
+                TitleReadSerializer.fast_data(page, fields)
+            )
+            if facets:
+                response.data['facets'] = facet_counts(
+                    titles, facets, self.matched_bits()
+                )
+            return response
+        return Response(TitleReadSerializer.fast_data(list(queryset), fields))
+
+    def matched_bits(self):
+        """Найденные произведения в виде множества битового индекса.
+
+        Известны, только если все условия запроса проверены по индексу.
+        """
+        filterset = getattr(self, 'filterset', None)
+        if filterset is None or self.request.query_params.get(
+            TitleSearchFilter.search_param, ''
+        ).strip():
+            return None
+        return filterset.matched_bits
+
+    @cached_property
+    def requested_facets(self):
+        """Фасеты из параметра `facets` в порядке `FACETS`.
+
+        Счётчики добавляются к постраничному ответу ключом `facets`.
+        """
+        value = self.request.query_params.get('facets', '')
+        requested = {name.strip() for name in value.split(',')} - {''}
+        unknown = requested - set(FACETS)
+        if unknown:
+            raise ValidationError({'facets': (
+                f'Неизвестные фасеты: {", ".join(sorted(unknown))}. '
+                f'Доступны: {", ".join(FACETS)}.'
+            )})
+        return [name for name in FACETS if name in requested]
+
+    @action(detail=True, methods=['get'])
+    def statistics(self, request, pk=None):
+        """Количество оценок, среднее, медиана и гистограмма."""
+        return self.cached_response(self.title_statistics, request, pk=pk)
+
+    def title_statistics(self, request, pk):
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        return Response(title_statistics(title.pk))
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """Похожие произведения из таблицы `SimilarTitle`.
+
+        Близость пересчитывается командой `refresh_similar_titles`.
+        """
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        scores = dict(SimilarTitle.objects.filter(title=title).order_by(
+            '-score', 'similar'
+        ).values_list('similar_id', 'score'))
+        titles = {
+            data['id']: data
+            for data in TitleReadSerializer.fast_data(list(
+                TitleReadSerializer.fast_queryset(
+                    Title.objects.filter(id__in=scores)
+                )
+            ))
+        }
+        return Response([
+            {**titles[title_id], 'similarity': round(score, 4)}
+            for title_id, score in scores.items()
+            if title_id in titles
+        ])
+
+
+class LeaderboardViewSet(
+    ConditionalGetMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet
+):
+    """Лучшие произведения по предрасчитанной таблице `TitleRanking`.
+
+    Параметры: `window` — `all` (по рейтингу) или `week` (по числу
+    отзывов за неделю), `genre` или `category` — slug области.
+    Каждая страница — поиск по индексу и два запроса за произведениями,
+    независимо от её номера.
+    """
+
+    queryset = TitleRanking.objects.all()
+    pagination_class = ScoreCursorPagination
+    permission_classes = (ReadOnlyPermission,)
+    stamp_key = stamps.RANKINGS
+
+    def get_stamp_queryset(self):
+        return Title.objects.all()
+
+    def get_scope(self):
+        params = self.request.query_params
+        if params.get('genre') and params.get('category'):
+            raise ValidationError(
+                'Укажите либо genre, либо category.'
+            )
+        for param, model, get_scope in (
+            ('genre', Genre, rankings.genre_scope),
+            ('category', Category, rankings.category_scope),
+        ):
+            slug = params.get(param)
+            if slug:
+                scope_id = model.objects.filter(slug=slug).values_list(
+                    'id', flat=True
+                ).first()
+                return None if scope_id is None else get_scope(scope_id)
+        return RANKING_GLOBAL_SCOPE
+
+    def get_queryset(self):
+        window = self.request.query_params.get('window', RANKING_ALL_TIME)
+        if window not in dict(TitleRanking.WINDOW_CHOICES):
+            raise ValidationError({'window': f'Неизвестный период: {window}.'})
+        scope = self.get_scope()
+        if scope is None:
+            return TitleRanking.objects.none()
+        return super().get_queryset().filter(window=window, scope=scope)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        titles = {
+            title['id']: title
+            for title in TitleReadSerializer.fast_data(list(
+                TitleReadSerializer.fast_queryset(Title.objects.filter(
+                    id__in=[ranking.title_id for ranking in page]
+                ))
+            ))
+        }
+        return self.get_paginated_response([
+            {
+                **titles[ranking.title_id],
+                'reviews_count': ranking.reviews_count
+            }
+            for ranking in page
+            if ranking.title_id in titles
+        ])
+
 
 class BaseViewSetCategoryGenre(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -158,6 +443,7 @@ class CategoryViewSet(
 ):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    stamp_key = stamps.CATEGORIES
 
 
 class GenreViewSet(
@@ -165,45 +451,115 @@ class GenreViewSet(
 ):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    stamp_key = stamps.GENRES
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SparseQuerysetMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    pagination_class = OptionalCursorPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
+    sparse_fields = {
+        'id': ('id',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_base_columns = ('pk', 'pub_date')
     permission_classes = (
         ReadOnlyPermission | IsAuthorOrAdminOrModerator | AdminPermission,
     )
 
+    @cached_property
+    def title(self):
+        """Произведение из URL, загружается один раз за запрос.
+
+        При создании отзыва сразу проверяется, есть ли у пользователя
+        отзыв на это произведение, чтобы сериализатору не нужен был
+        отдельный запрос.
+        """
+        titles = Title.objects.all()
+        user = self.request.user
+        if self.request.method == 'POST' and user.is_authenticated:
+            titles = titles.annotate(has_user_review=Exists(
+                Review.objects.filter(
+                    title=OuterRef('pk'), author=user
+                )
+            ))
+        return get_object_or_404(titles, id=self.kwargs['title_id'])
+
     def get_queryset(self):
-        return self.get_review().reviews.all()
+        return self.title.reviews.select_related('author')
+
+    def get_stamp_key(self):
+        return stamps.reviews_key(self.kwargs['title_id'])
+
+    def get_stamp_queryset(self):
+        return Review.objects.filter(title_id=self.kwargs['title_id'])
 
-    def get_review(self):
-        return get_object_or_404(Title, id=self.kwargs['title_id'])
+    def get_pagination_count(self):
+        return self.title.reviews_count
 
+    # Отзыв записывается в одной транзакции со счётчиками произведения,
+    # которые обновляют сигналы: сбой на середине не оставит расхождений.
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(
             author=self.request.user,
-            title=self.get_review()
+            title=self.title
         )
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+
+
+class CommentViewSet(SparseQuerysetMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = OptionalCursorPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
+    sparse_fields = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_base_columns = ('pk', 'pub_date')
     permission_classes = (
         ReadOnlyPermission | IsAuthorOrAdminOrModerator | AdminPermission,
     )
 
+    @cached_property
+    def review(self):
+        """Отзыв из URL вместе с произведением, одним запросом.
+
+        Отзыв должен принадлежать произведению из URL, иначе — 404.
+        """
+        return get_object_or_404(
+            Review.objects.select_related('title'),
+            id=self.kwargs['review_id'],
+            title_id=self.kwargs['title_id']
+        )
+
     def get_queryset(self):
         """Получить все комментарии к отзыву."""
-        return self.get_review().comments.all()
+        return self.review.comments.select_related('author')
+
+    def get_stamp_key(self):
+        return stamps.comments_key(self.kwargs['review_id'])
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs['review_id'])
+    def get_stamp_queryset(self):
+        return Comment.objects.filter(review_id=self.kwargs['review_id'])
 
     def perform_create(self, serializer):
         """Добавить новый комментарий к отзыву."""
         serializer.save(
             author=self.request.user,
-            review=self.get_review()
+            review=self.review
         )
@@ -35,15 +35,65 @@ USER_ME = 'me'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Письма ставятся в очередь и отправляются командой send_emails.
+# None — отправлять сразу, если EMAIL_BACKEND локальный (console, locmem).
+EMAIL_OUTBOX_EAGER = None
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+# На сколько секунд воркер захватывает письма на время отправки.
+EMAIL_OUTBOX_LEASE = 300
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Без orjson оба класса работают как стандартные JSON-классы DRF.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+TITLES_CACHE = {
+    'BACKEND': 'api.cache.LocMemLRUCache',
+    'OPTIONS': {
+        'MAX_ENTRIES': 1024,
+        'MAX_SIZE': 32 * 1024 * 1024,
+        'TIMEOUT': 60,
+    },
+}
+
+# Сколько секунд пользователь из кэша или роль из токена считаются
+# актуальными для читающих запросов.
+USER_CACHE_STALENESS = 60
+USER_CACHE_MAX_ENTRIES = 10000
+
+# max-age в Cache-Control ответов анонимным клиентам. При 0 общий
+# HTTP-кэш хранит ответ, но каждый раз перепроверяет его по ETag.
+API_CACHE_MAX_AGE = 0
+
+# Битовый индекс жанров, категорий и лет для фильтрации произведений
+# и через сколько секунд перестраивать его, чтобы учесть изменения
+# из других процессов.
+TITLE_BITMAP_INDEX = True
+TITLE_BITMAP_STALENESS = 60
+
+# Сколько похожих произведений хранить для каждого произведения.
+SIMILAR_TITLES_COUNT = 10
+# Сколько произведений возвращать в рекомендациях пользователю.
+RECOMMENDATIONS_COUNT = 20
+# Сколько секунд хранить рекомендации в кэше: после пересчёта похожих
+# произведений они обновятся не позже чем через это время.
+RECOMMENDATIONS_CACHE_TIMEOUT = 600
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -87,6 +137,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Транзакция сразу берёт блокировку записи: иначе две транзакции,
+        # которые сначала читают, а затем пишут, не дождутся друг друга
+        # и одна из них упадёт с `database is locked`.
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
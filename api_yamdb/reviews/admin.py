@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import User, Genre, Category, Title, Review, Comment
+from .models import (
+    User, Genre, Category, Title, Review, Comment, OutgoingEmail
+)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -47,7 +49,9 @@ class TitleAdmin(admin.ModelAdmin):
         'name',
         'category',
         'year',
-        'description'
+        'description',
+        'rating',
+        'reviews_count'
     )
     list_editable = (
         'category',
@@ -96,10 +100,24 @@ class CommentAdmin(admin.ModelAdmin):
     list_display_links = ('title',)
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject',
+        'recipients',
+        'created_at',
+        'send_after',
+        'sent_at',
+        'attempts'
+    )
+    list_filter = ('sent_at',)
+    readonly_fields = ('created_at',)
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
 admin.site.empty_value_display = 'Не задано'
@@ -0,0 +1,282 @@
+"""Битовый индекс произведений для фильтрации по жанрам, категории и году.
+
+Для каждого жанра, категории и года в памяти процесса хранится
+множество id произведений в виде целого Python, где бит `i` означает
+произведение с id `i`. Пересечение и объединение множеств — побитовые
+операции над целыми, поэтому фильтр по нескольким жанрам не требует
+соединений с таблицей жанров; в БД уходит один запрос `id IN (...)`.
+
+Индекс строится при первом обращении. Изменения произведений и их
+жанров текущего процесса применяются после коммита транзакции,
+а изменения из других процессов и массовые загрузки в обход сигналов
+учитываются пересборкой индекса раз в `TITLE_BITMAP_STALENESS` секунд.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from reviews.deferred import on_commit_for_ids
+from reviews.models import Category, Genre, Title
+
+DEFAULT_TITLE_BITMAP_STALENESS = 60
+BATCH_SIZE = 10000
+
+
+def to_bits(ids):
+    """Множество из массива id."""
+    if not len(ids):
+        return 0
+    flags = np.zeros(int(ids.max()) + 1, dtype=bool)
+    flags[ids] = True
+    return int.from_bytes(
+        np.packbits(flags, bitorder='little').tobytes(), 'little'
+    )
+
+
+def to_ids(bits):
+    """Упорядоченный массив id множества."""
+    data = np.frombuffer(
+        bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), np.uint8
+    )
+    return np.flatnonzero(np.unpackbits(data, bitorder='little'))
+
+
+def id_filter(ids):
+    """Условие `id IN (...)` для любого числа id.
+
+    На SQLite список передаётся одним параметром через `json_each`,
+    чтобы не упереться в ограничение числа параметров запроса.
+    """
+    ids = [int(pk) for pk in ids]
+    if connection.vendor == 'sqlite':
+        return Q(pk__in=RawSQL(
+            'SELECT value FROM json_each(%s)', [json.dumps(ids)]
+        ))
+    return Q(pk__in=ids)
+
+
+class TitleBitmapIndex:
+    """Множества произведений по жанрам, категориям и годам."""
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.titles = {}
+        self.all = 0
+        self.genres = defaultdict(int)
+        self.categories = defaultdict(int)
+        self.years = defaultdict(int)
+        self.genre_names = {
+            pk: (name, slug)
+            for pk, name, slug in Genre.objects.values_list(
+                'id', 'name', 'slug'
+            )
+        }
+        self.category_names = {
+            pk: (name, slug)
+            for pk, name, slug in Category.objects.values_list(
+                'id', 'name', 'slug'
+            )
+        }
+        self.genre_slugs = {
+            slug: pk for pk, (_, slug) in self.genre_names.items()
+        }
+        self.category_slugs = {
+            slug: pk for pk, (_, slug) in self.category_names.items()
+        }
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        genres = defaultdict(list)
+        for title_id, genre_id in Title.genre.through.objects.values_list(
+            'title_id', 'genre_id'
+        ).iterator(chunk_size=BATCH_SIZE):
+            genres[title_id].append(genre_id)
+        columns = defaultdict(lambda: defaultdict(list))
+        for title_id, category_id, year in Title.objects.values_list(
+            'id', 'category_id', 'year'
+        ).iterator(chunk_size=BATCH_SIZE):
+            title_genres = frozenset(genres[title_id])
+            index.titles[title_id] = (category_id, year, title_genres)
+            columns['all'][None].append(title_id)
+            columns['years'][year].append(title_id)
+            if category_id is not None:
+                columns['categories'][category_id].append(title_id)
+            for genre_id in title_genres:
+                columns['genres'][genre_id].append(title_id)
+        for name, sets in columns.items():
+            bitsets = {
+                key: to_bits(np.array(ids, dtype=np.int64))
+                for key, ids in sets.items()
+            }
+            if name == 'all':
+                index.all = bitsets[None]
+            else:
+                getattr(index, name).update(bitsets)
+        return index
+
+    def _remove(self, title_id):
+        previous = self.titles.pop(title_id, None)
+        if previous is None:
+            return
+        category_id, year, genre_ids = previous
+        mask = ~(1 << title_id)
+        self.all &= mask
+        self.years[year] &= mask
+        if category_id is not None:
+            self.categories[category_id] &= mask
+        for genre_id in genre_ids:
+            self.genres[genre_id] &= mask
+
+    def _add(self, title_id, category_id, year, genre_ids):
+        bit = 1 << title_id
+        self.titles[title_id] = (category_id, year, genre_ids)
+        self.all |= bit
+        self.years[year] |= bit
+        if category_id is not None:
+            self.categories[category_id] |= bit
+        for genre_id in genre_ids:
+            self.genres[genre_id] |= bit
+
+    def refresh(self, title_ids):
+        """Перечитать произведения из БД; удалённые убрать из индекса."""
+        genres = defaultdict(set)
+        for title_id, genre_id in Title.genre.through.objects.filter(
+            title_id__in=title_ids
+        ).values_list('title_id', 'genre_id'):
+            genres[title_id].add(genre_id)
+        rows = Title.objects.filter(pk__in=title_ids).values_list(
+            'id', 'category_id', 'year'
+        )
+        with self.lock:
+            for title_id in title_ids:
+                self._remove(title_id)
+            for title_id, category_id, year in rows:
+                self._add(
+                    title_id, category_id, year, frozenset(genres[title_id])
+                )
+
+    def match(self, genres=None, match_all_genres=False, categories=None,
+              year_min=None, year_max=None):
+        """Множество произведений, подходящих под все условия.
+
+        Жанры и категории задаются списками slug; из жанров нужен любой,
+        а при `match_all_genres` — все. Возвращает None, если условий нет.
+        """
+        conditions = []
+        with self.lock:
+            if genres:
+                bitsets = [
+                    self.genres.get(self.genre_slugs.get(slug), 0)
+                    for slug in genres
+                ]
+                conditions.append(
+                    intersect(bitsets) if match_all_genres
+                    else union(bitsets)
+                )
+            if categories:
+                conditions.append(union(
+                    self.categories.get(self.category_slugs.get(slug), 0)
+                    for slug in categories
+                ))
+            if year_min is not None or year_max is not None:
+                conditions.append(union(
+                    bits for year, bits in self.years.items()
+                    if (year_min is None or year >= year_min)
+                    and (year_max is None or year <= year_max)
+                ))
+        if not conditions:
+            return None
+        return intersect(conditions)
+
+    def counts(self, bits, facet):
+        """Число произведений множества `bits` в каждом значении фасета.
+
+        Фасеты: `genre` и `category` (ключ — пара из названия и slug)
+        и `year`. Значения без произведений не возвращаются.
+        """
+        bitsets, names = {
+            'genre': (self.genres, self.genre_names),
+            'category': (self.categories, self.category_names),
+            'year': (self.years, None),
+        }[facet]
+        with self.lock:
+            counts = {
+                key: (value & bits).bit_count()
+                for key, value in bitsets.items()
+            }
+        return {
+            key if names is None else names[key]: count
+            for key, count in counts.items()
+            if count and (names is None or key in names)
+        }
+
+
+def union(bitsets):
+    result = 0
+    for bits in bitsets:
+        result |= bits
+    return result
+
+
+def intersect(bitsets):
+    bitsets = iter(bitsets)
+    result = next(bitsets, 0)
+    for bits in bitsets:
+        result &= bits
+    return result
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'TITLE_BITMAP_INDEX', True)
+
+
+def get_title_index():
+    """Индекс текущего процесса; строится заново, если устарел."""
+    global _index
+    staleness = getattr(
+        settings, 'TITLE_BITMAP_STALENESS', DEFAULT_TITLE_BITMAP_STALENESS
+    )
+    index = _index
+    if index is None or time.monotonic() - index.built_at > staleness:
+        with _index_lock:
+            index = _index
+            if (
+                index is None
+                or time.monotonic() - index.built_at > staleness
+            ):
+                index = _index = TitleBitmapIndex.build()
+    return index
+
+
+def reset_title_index():
+    """Сбросить индекс; он будет построен заново при обращении."""
+    global _index
+    _index = None
+
+
+def refresh_titles(title_ids):
+    index = _index
+    if index is not None:
+        index.refresh(title_ids)
+
+
+def refresh_on_commit(*title_ids):
+    """Обновить произведения в индексе после коммита транзакции."""
+    on_commit_for_ids(refresh_titles, title_ids)
+
+
+def reset_on_commit():
+    transaction.on_commit(reset_title_index)
@@ -0,0 +1,40 @@
+"""Действия над произведениями, отложенные до коммита транзакции.
+
+Сигналы одной транзакции часто затрагивают одно и то же произведение
+несколько раз: сохранение произведения, затем его жанров. Id
+накапливаются в множестве, и действие выполняется один раз после
+коммита для всех них.
+"""
+import threading
+
+from django.db import transaction
+
+# Id, ожидающие коммита, по действиям; соединения с БД у каждого
+# потока свои, поэтому и состояние хранится отдельно для потока.
+_pending = threading.local()
+
+
+def on_commit_for_ids(action, ids):
+    """Вызвать `action(ids)` после коммита для всех id транзакции.
+
+    Вне транзакции действие выполняется сразу. Колбэк регистрируется
+    при каждом вызове, но первый из них забирает все накопленные id,
+    а остальные ничего не делают. Если транзакция откатится, её id
+    останутся в очереди и будут обработаны со следующей — повторный
+    пересчёт безвреден.
+    """
+    ids = set(ids) - {None}
+    if not ids:
+        return
+    if not transaction.get_connection().in_atomic_block:
+        action(ids)
+        return
+    pending = _pending.__dict__.setdefault('ids', {})
+    pending.setdefault(action, set()).update(ids)
+
+    def callback():
+        ids = pending.pop(action, None)
+        if ids:
+            action(ids)
+
+    transaction.on_commit(callback)
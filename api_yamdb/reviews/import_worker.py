@@ -0,0 +1,25 @@
+"""Разбор CSV-файла в отдельном процессе для `import_data --workers`.
+
+Модуль не импортирует Django на верхнем уровне: при запуске процессов
+методом spawn (по умолчанию в Windows и macOS) дочерний процесс
+импортирует его, чтобы найти функцию, ещё до настройки приложений.
+"""
+
+
+def parse_worker(csv_file_path, model_label, batch_size, queue):
+    """Разобрать файл и передать пачки в очередь."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    from reviews.management.commands.import_data import read_batches
+
+    try:
+        model = apps.get_model(model_label)
+        for batch in read_batches(csv_file_path, model, batch_size):
+            queue.put(('batch', batch))
+    except Exception as e:
+        queue.put(('error', str(e)))
+    else:
+        queue.put(('done', None))
@@ -0,0 +1,124 @@
+import csv
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.management.commands.import_data import (
+    FOREIGN_KEY_FIELDS, MODEL_AND_CSV_MATCHING, rate
+)
+from reviews.models import User
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl')
+# Пользователи выгружаются только с полями исходного users.csv:
+# хеши паролей, права и даты входа в выгрузку не попадают.
+EXPORTED_FIELDS = {
+    User: ('id', 'username', 'email', 'role', 'bio', 'first_name',
+           'last_name'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает данные в файлы в формате import_data. Таблицы читаются '
+        'итератором по частям, поэтому память не зависит от их размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='export/',
+            help='Каталог для файлов выгрузки.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS, default='csv',
+            help='Формат файлов: csv или jsonl (JSON Lines).'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, получаемых из БД за один раз.'
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        os.makedirs(kwargs['output'], exist_ok=True)
+        for model, csv_file_name in MODEL_AND_CSV_MATCHING.items():
+            file_name = csv_file_name
+            if kwargs['format'] != 'csv':
+                file_name = f'{os.path.splitext(file_name)[0]}.jsonl'
+            if kwargs['gzip']:
+                file_name += '.gz'
+            path = os.path.join(kwargs['output'], file_name)
+            started = time.monotonic()
+            with open_output(path, kwargs['gzip']) as output:
+                rows = export_model(
+                    model, output, kwargs['format'], kwargs['chunk_size']
+                )
+            self.stdout.write(
+                f'{path}: выгружено {rows} строк за '
+                f'{time.monotonic() - started:.2f} с '
+                f'({rate(rows, started):.0f} строк/с).'
+            )
+        self.stdout.write('Данные успешно выгружены.')
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def get_columns(model):
+    """Колонки выгрузки и соответствующие им атрибуты модели.
+
+    Внешние ключи из FOREIGN_KEY_FIELDS выгружаются под именем поля,
+    как их ожидает import_data, остальные — под `attname`. Для моделей
+    из EXPORTED_FIELDS выгружаются только перечисленные поля.
+    """
+    columns = []
+    for field in model._meta.concrete_fields:
+        if model in EXPORTED_FIELDS and (
+            field.name not in EXPORTED_FIELDS[model]
+        ):
+            continue
+        column = field.name if field.name in FOREIGN_KEY_FIELDS else (
+            field.attname
+        )
+        columns.append((column, field.attname))
+    return columns
+
+
+def export_model(model, output, output_format, chunk_size):
+    """Записать все строки таблицы модели, возвращает их количество."""
+    columns = get_columns(model)
+    rows = model.objects.order_by('pk').values_list(
+        *(attname for _, attname in columns)
+    ).iterator(chunk_size=chunk_size)
+    names = [column for column, _ in columns]
+    count = 0
+    if output_format == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(
+                '' if value is None else (
+                    value.isoformat() if hasattr(value, 'isoformat')
+                    else value
+                )
+                for value in row
+            )
+            count += 1
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            output.write(encoder.encode(dict(zip(names, row))))
+            output.write('\n')
+            count += 1
+    return count
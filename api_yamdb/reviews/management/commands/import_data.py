@@ -1,50 +1,217 @@
-import os
 import csv
-from django.core.management.base import BaseCommand
+import multiprocessing
+import os
+import time
+from collections import deque
+from queue import Empty
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
 from reviews import models
+from reviews.import_worker import parse_worker
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import rebuild_ratings
+from reviews.search import get_search_backend
+from reviews.statistics import rebuild_score_counts
+from reviews.stamps import bump_all
 
 CSV_DIR_PATH = 'static/data/'
 
 FOREIGN_KEY_FIELDS = ('author', 'category')
 
+# Порядок важен: файлы загружаются так, чтобы внешние ключи
+# ссылались на уже загруженные записи.
 MODEL_AND_CSV_MATCHING = {
     models.User: 'users.csv',
     models.Genre: 'genre.csv',
     models.Category: 'category.csv',
     models.Title: 'titles.csv',
+    models.Title.genre.through: 'genre_title.csv',
     models.Review: 'review.csv',
     models.Comment: 'comments.csv',
 }
 
+DEFAULT_BATCH_SIZE = 1000
+PROGRESS_EVERY_BATCHES = 10
+
 
 class Command(BaseCommand):
+    help = (
+        'Загружает данные из CSV-файлов пачками, не читая файлы целиком. '
+        'С --workers файлы разбираются параллельно в отдельных процессах, '
+        'а записываются в БД в порядке внешних ключей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=CSV_DIR_PATH,
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество строк в одной пачке bulk_create.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Количество процессов для разбора файлов.'
+        )
+
     def handle(self, *args, **kwargs):
+        if kwargs['batch_size'] < 1 or kwargs['workers'] < 1:
+            raise CommandError(
+                '--batch-size и --workers должны быть положительными.'
+            )
+        self.batch_size = kwargs['batch_size']
+        self.verbosity = kwargs['verbosity']
+        files = [
+            (model, os.path.join(kwargs['path'], csv_file_name))
+            for model, csv_file_name in MODEL_AND_CSV_MATCHING.items()
+        ]
+        if kwargs['workers'] > 1:
+            sources = parallel_batches(
+                files, self.batch_size, kwargs['workers']
+            )
+        else:
+            sources = (
+                (model, path, read_batches(path, model, self.batch_size))
+                for model, path in files
+            )
+
         error_occurred = False
-        for model, csv_file_name in MODEL_AND_CSV_MATCHING.items():
-            csv_file_path = os.path.join(CSV_DIR_PATH, csv_file_name)
+        for model, csv_file_path, batches in sources:
             try:
-                with open(
-                    csv_file_path, newline='', encoding='utf-8'
-                ) as csv_file:
-                    csv_serializer(csv.DictReader(csv_file), model)
+                self.load(model, csv_file_path, batches)
             except Exception as e:
                 self.stderr.write(
                     f'Error processing file {csv_file_path}: {e}'
                 )
                 error_occurred = True
 
+        rebuild_ratings()
+        rebuild_score_counts()
+        rebuild_rankings()
+        get_search_backend().rebuild()
+        bump_all()
         if error_occurred:
             self.stderr.write('Ошибка при загрузке данных.')
         else:
             self.stdout.write('Данные успешно загружены.')
 
+    def load(self, model, csv_file_path, batches):
+        """Записать пачки строк в БД, сообщая о скорости загрузки."""
+        started = time.monotonic()
+        rows = 0
+        for number, batch in enumerate(batches, 1):
+            model.objects.bulk_create(
+                [model(**row) for row in batch], ignore_conflicts=True
+            )
+            rows += len(batch)
+            if self.verbosity > 1 and number % PROGRESS_EVERY_BATCHES == 0:
+                self.stdout.write(
+                    f'{csv_file_path}: {rows} строк, '
+                    f'{rate(rows, started):.0f} строк/с'
+                )
+        self.stdout.write(
+            f'{csv_file_path}: загружено {rows} строк за '
+            f'{time.monotonic() - started:.2f} с '
+            f'({rate(rows, started):.0f} строк/с).'
+        )
+
+
+def rate(rows, started):
+    return rows / max(time.monotonic() - started, 1e-9)
+
+
+def get_row_converter(model, columns):
+    """Функция, приводящая строку CSV к значениям полей модели.
+
+    Колонки из FOREIGN_KEY_FIELDS содержат первичный ключ и записываются
+    в `<field>_id`. Значения проверяются `to_python` соответствующих полей.
+    """
+    fields = []
+    for column in columns:
+        name = f'{column}_id' if column in FOREIGN_KEY_FIELDS else column
+        field = model._meta.get_field(name)
+        fields.append((column, field.attname, field))
+
+    def convert(row):
+        values = {}
+        for column, attname, field in fields:
+            value = row[column]
+            if value == '' and not field.empty_strings_allowed:
+                value = None
+            values[attname] = field.to_python(value)
+        return values
+
+    return convert
+
+
+def read_batches(csv_file_path, model, batch_size):
+    """Лениво читать CSV-файл пачками проверенных значений полей."""
+    with open(csv_file_path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file)
+        convert = get_row_converter(model, reader.fieldnames or ())
+        batch = []
+        for row in reader:
+            try:
+                batch.append(convert(row))
+            except ValidationError as e:
+                raise ValueError(
+                    f'строка {reader.line_num}: {"; ".join(e.messages)}'
+                ) from e
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def queued_batches(process, queue):
+    try:
+        while True:
+            try:
+                kind, payload = queue.get(timeout=1)
+            except Empty:
+                if not process.is_alive():
+                    raise ValueError('процесс разбора завершился аварийно')
+                continue
+            if kind == 'batch':
+                yield payload
+                continue
+            if kind == 'error':
+                raise ValueError(payload)
+            return
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def parallel_batches(files, batch_size, workers):
+    """Разбирать до `workers` файлов одновременно, отдавая их по порядку.
+
+    Очереди ограничены, поэтому процесс, опередивший загрузку, ждёт,
+    а потребление памяти не зависит от размера файлов.
+    """
+    connections.close_all()
+    pending = deque(files)
+    running = deque()
+
+    def start_next():
+        model, path = pending.popleft()
+        queue = multiprocessing.Queue(maxsize=2)
+        process = multiprocessing.Process(
+            target=parse_worker,
+            args=(path, model._meta.label, batch_size, queue),
+            daemon=True
+        )
+        process.start()
+        running.append((model, path, process, queue))
 
-def csv_serializer(csv_data, model):
-    objs = []
-    for row in csv_data:
-        for field in FOREIGN_KEY_FIELDS:
-            if field in row:
-                row[f'{field}_id'] = row[field]
-                del row[field]
-        objs.append(model(**row))
-    model.objects.bulk_create(objs, ignore_conflicts=True)
+    while pending or running:
+        while pending and len(running) < workers:
+            start_next()
+        model, path, process, queue = running.popleft()
+        yield model, path, queued_batches(process, queue)
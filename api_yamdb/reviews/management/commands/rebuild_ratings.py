@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews import stamps
+from reviews.rankings import rebuild_rankings
+from reviews.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг произведений по таблице отзывов.'
+
+    def handle(self, *args, **kwargs):
+        updated = rebuild_ratings()
+        stamps.bump(stamps.TITLES)
+        rebuild_rankings()
+        self.stdout.write(f'Рейтинг пересчитан для {updated} произведений.')
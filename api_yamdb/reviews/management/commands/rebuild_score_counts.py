@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import stamps
+from reviews.statistics import BATCH_SIZE, rebuild_score_counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики оценок произведений по таблице отзывов. '
+        'Нужна после загрузки отзывов в обход сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько отзывов читать из БД за один раз.'
+        )
+
+    def handle(self, *args, batch_size, **kwargs):
+        started = time.perf_counter()
+        reviews, counters = rebuild_score_counts(batch_size)
+        stamps.bump(stamps.TITLES)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Обработано отзывов: {reviews}, записано счётчиков: '
+            f'{counters} за {elapsed:.2f} с '
+            f'({reviews / max(elapsed, 1e-9):.0f} отзывов/с).'
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reviews.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Строит заново поисковый индекс произведений.'
+
+    def handle(self, *args, **kwargs):
+        get_search_backend().rebuild()
+        self.stdout.write('Поисковый индекс перестроен.')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reviews.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает таблицу рейтингов лидерборда. Запускайте '
+        'по расписанию, чтобы старые отзывы выбывали из недельного рейтинга.'
+    )
+
+    def handle(self, *args, **kwargs):
+        written = rebuild_rankings()
+        self.stdout.write(f'Рейтинги пересчитаны: {written} строк.')
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.similarity import BATCH_SIZE, refresh_similar_titles
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает похожие произведения для произведений, отзывы '
+        'которых изменились с прошлого запуска. Запускайте по расписанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать похожие произведения для всех произведений.'
+        )
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=None,
+            help='Сколько похожих произведений хранить для каждого.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько отзывов читать из БД за один раз.'
+        )
+
+    def handle(self, *args, full, count, batch_size, **kwargs):
+        started = time.perf_counter()
+        titles, written = refresh_similar_titles(full, count, batch_size)
+        self.stdout.write(
+            f'Похожие произведения пересчитаны для {titles} произведений: '
+            f'{written} строк за {time.perf_counter() - started:.2f} с.'
+        )
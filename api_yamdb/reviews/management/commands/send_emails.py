@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.outbox import claim_emails, send_emails
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками через одно соединение. '
+        'Неудачные отправки повторяются с растущей задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Количество писем в одной пачке.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=DEFAULT_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить накопившиеся письма и завершиться.'
+        )
+
+    def handle(self, *args, **kwargs):
+        while True:
+            sent, failed = self.send_batch(kwargs['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, с ошибкой: {failed}.'
+                )
+            if kwargs['once'] and not sent + failed:
+                return
+            if not sent + failed:
+                time.sleep(kwargs['interval'])
+
+    def send_batch(self, batch_size):
+        """Захватить пачку писем и отправить её вне транзакции."""
+        return send_emails(claim_emails(batch_size))
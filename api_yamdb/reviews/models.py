@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -12,6 +13,9 @@ MODERATOR = 'moderator'
 USER = 'user'
 USERNAME_LENGTH_MAX = 150
 EMAIL_LENGTH_MAX = 254
+RANKING_ALL_TIME = 'all'
+RANKING_WEEK = 'week'
+RANKING_GLOBAL_SCOPE = 'all'
 
 
 class User(AbstractUser):
@@ -71,6 +75,10 @@ class BaseNamedModel(models.Model):
         max_length=50,
         unique=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     def __str__(self):
         return self.name
@@ -122,6 +130,26 @@ class Title(models.Model):
         blank=True,
         null=True
     )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False
+    )
+    score_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     def __str__(self):
         return self.name
@@ -130,6 +158,22 @@ class Title(models.Model):
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['year', 'name'], name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=['category', 'name'], name='title_category_name_idx'
+            ),
+            # Сортировка списка произведений: `?ordering=` по этим полям
+            # в любом направлении читается из индекса.
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(fields=['year', 'id'], name='title_year_idx'),
+            models.Index(fields=['rating', 'id'], name='title_rating_idx'),
+            models.Index(
+                fields=['reviews_count', 'id'], name='title_reviews_count_idx'
+            ),
+        ]
 
 
 class BaseTextModel(models.Model):
@@ -145,6 +189,10 @@ class BaseTextModel(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
 
     class Meta:
         abstract = True
@@ -174,6 +222,17 @@ class Review(BaseTextModel):
                 name='unique_review_per_title'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+            # Покрывающий индекс для пересчёта рейтинга: COUNT и SUM
+            # по произведению читаются из индекса без обращения к таблице.
+            models.Index(
+                fields=['title', 'score'], name='review_title_score_idx'
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
@@ -190,3 +249,210 @@ class Comment(BaseTextModel):
     class Meta(BaseTextModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class ScoreCount(models.Model):
+    """Количество отзывов произведения с данной оценкой."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='score_counts',
+        verbose_name='Произведение'
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} × {self.count}'
+
+    class Meta:
+        verbose_name = 'Количество оценок'
+        verbose_name_plural = 'Количество оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'], name='unique_title_score_count'
+            )
+        ]
+
+
+class SimilarTitle(models.Model):
+    """Похожее произведение и косинусная близость их оценок."""
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_titles',
+        verbose_name='Произведение'
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожее произведение'
+    )
+    score = models.FloatField(verbose_name='Близость')
+
+    def __str__(self):
+        return f'{self.title_id} ~ {self.similar_id}: {self.score:.3f}'
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'similar'], name='unique_similar_title'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['title', '-score', 'similar'],
+                name='similar_title_order_idx'
+            ),
+        ]
+
+
+class TitleRanking(models.Model):
+    """Позиция произведения в рейтинге за период в пределах области.
+
+    Область — все произведения (`all`), жанр (`genre:<id>`) или категория
+    (`category:<id>`). Порядок задаёт `score`: за всё время — рейтинг,
+    затем число отзывов; за неделю — число отзывов, затем рейтинг.
+    """
+
+    WINDOW_CHOICES = [
+        (RANKING_ALL_TIME, 'За всё время'),
+        (RANKING_WEEK, 'За неделю'),
+    ]
+    window = models.CharField(
+        verbose_name='Период',
+        max_length=8,
+        choices=WINDOW_CHOICES
+    )
+    scope = models.CharField(verbose_name='Область', max_length=32)
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение'
+    )
+    score = models.BigIntegerField(verbose_name='Вес')
+    reviews_count = models.PositiveIntegerField(
+        verbose_name='Отзывов за период'
+    )
+
+    def __str__(self):
+        return f'{self.window} {self.scope}: {self.title_id}'
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Позиции в рейтинге'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['window', 'scope', 'title'],
+                name='unique_title_ranking'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['window', 'scope', '-score', 'title'],
+                name='title_ranking_order_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    subject = models.CharField(verbose_name='Тема', max_length=256)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=EMAIL_LENGTH_MAX
+    )
+    recipients = models.JSONField(verbose_name='Получатели')
+    created_at = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    send_after = models.DateTimeField(
+        verbose_name='Отправить не раньше',
+        default=timezone.now
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        blank=True,
+        null=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+
+    def __str__(self):
+        return self.subject
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('send_after',)
+        indexes = [
+            models.Index(
+                fields=['sent_at', 'send_after'],
+                name='outgoing_email_queue_idx'
+            ),
+        ]
+
+
+class VersionStamp(models.Model):
+    """Версия коллекции объектов для условных запросов.
+
+    Увеличивается при каждом изменении коллекции, в том числе при
+    удалении, которое не оставляет следа в `updated_at` объектов.
+    """
+    key = models.CharField(
+        verbose_name='Коллекция',
+        max_length=64,
+        unique=True
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1
+    )
+    updated_at = models.DateTimeField(verbose_name='Дата изменения')
+
+    def __str__(self):
+        return f'{self.key}: {self.version}'
+
+    class Meta:
+        verbose_name = 'Версия коллекции'
+        verbose_name_plural = 'Версии коллекций'
+
+
+class RefreshCheckpoint(models.Model):
+    """Время начала последнего успешного запуска фоновой задачи.
+
+    Хранится отдельно от `VersionStamp`: массовое увеличение версий
+    после загрузки данных не должно сдвигать отметку, иначе следующий
+    инкрементальный пересчёт пропустит загруженное.
+    """
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=64,
+        unique=True
+    )
+    started_at = models.DateTimeField(verbose_name='Начало запуска')
+
+    def __str__(self):
+        return f'{self.name}: {self.started_at}'
+
+    class Meta:
+        verbose_name = 'Отметка пересчёта'
+        verbose_name_plural = 'Отметки пересчёта'
@@ -0,0 +1,150 @@
+"""Очередь исходящих писем.
+
+Письма сохраняются в таблицу `OutgoingEmail` и отправляются командой
+`send_emails` пачками через одно SMTP-соединение. Неудачные отправки
+повторяются с экспоненциально растущей задержкой.
+
+С локальными бэкендами почты (console, locmem, dummy) письма
+отправляются сразу после коммита транзакции, поэтому в разработке
+и в тестах воркер не нужен. Поведение задаётся `EMAIL_OUTBOX_EAGER`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+LOCAL_EMAIL_BACKENDS = (
+    'django.core.mail.backends.console.EmailBackend',
+    'django.core.mail.backends.locmem.EmailBackend',
+    'django.core.mail.backends.dummy.EmailBackend',
+)
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 60
+DEFAULT_LEASE = 300
+MAX_RETRY_DELAY = 6 * 60 * 60
+
+
+def is_eager():
+    eager = getattr(settings, 'EMAIL_OUTBOX_EAGER', None)
+    if eager is None:
+        return settings.EMAIL_BACKEND in LOCAL_EMAIL_BACKENDS
+    return eager
+
+
+def enqueue_email(subject, message, from_email, recipient_list):
+    """Поставить письмо в очередь на отправку."""
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        recipients=list(recipient_list)
+    )
+    if is_eager():
+        transaction.on_commit(
+            lambda: send_emails(OutgoingEmail.objects.filter(pk=email.pk))
+        )
+    return email
+
+
+def retry_delay(attempts):
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def due_emails(batch_size, max_attempts=None):
+    """Пачка писем, которые пора отправить."""
+    if max_attempts is None:
+        max_attempts = getattr(
+            settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS
+        )
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        send_after__lte=timezone.now(),
+        attempts__lt=max_attempts
+    ).order_by('send_after')[:batch_size]
+
+
+def claim_emails(batch_size):
+    """Захватить пачку писем на время отправки.
+
+    В короткой транзакции письмам переносится `send_after` на
+    `EMAIL_OUTBOX_LEASE` секунд вперёд, поэтому другие воркеры их
+    не выбирают, а письма воркера, упавшего посреди отправки, снова
+    станут доступны по истечении аренды. Блокировка с пропуском
+    занятых строк не даёт двум воркерам захватить одно письмо.
+    """
+    lease = getattr(settings, 'EMAIL_OUTBOX_LEASE', DEFAULT_LEASE)
+    with transaction.atomic():
+        emails = list(due_emails(batch_size).select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
+        ))
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(send_after=timezone.now() + timedelta(seconds=lease))
+    return emails
+
+
+def deliver(emails):
+    """Отправить письма через одно соединение, не обращаясь к БД.
+
+    Возвращает словарь {письмо: текст ошибки или None}. Ошибка
+    отправки одного письма не прерывает отправку остальных, а ошибка
+    открытия соединения записывается всем письмам пачки.
+    """
+    results = {}
+    try:
+        with get_connection() as mail_connection:
+            for email in emails:
+                try:
+                    EmailMessage(
+                        email.subject,
+                        email.body,
+                        from_email=email.from_email,
+                        to=email.recipients,
+                        connection=mail_connection
+                    ).send()
+                except Exception as e:
+                    results[email] = str(e)
+                else:
+                    results[email] = None
+    except Exception as e:
+        for email in emails:
+            results.setdefault(email, str(e))
+    return results
+
+
+def record_results(results):
+    """Сохранить итоги отправки одной короткой транзакцией."""
+    now = timezone.now()
+    for email, error in results.items():
+        email.attempts += 1
+        if error is None:
+            email.sent_at = now
+        else:
+            email.last_error = error
+            email.send_after = now + retry_delay(email.attempts)
+    with transaction.atomic():
+        OutgoingEmail.objects.bulk_update(
+            results,
+            ('attempts', 'sent_at', 'last_error', 'send_after')
+        )
+
+
+def send_emails(emails):
+    """Отправить письма и записать результат.
+
+    Отправка идёт вне транзакции, чтобы не держать блокировку БД
+    на время обмена с SMTP-сервером. Возвращает количество
+    отправленных и неудачных писем.
+    """
+    emails = list(emails)
+    if not emails:
+        return 0, 0
+    results = deliver(emails)
+    record_results(results)
+    failed = sum(error is not None for error in results.values())
+    return len(results) - failed, failed
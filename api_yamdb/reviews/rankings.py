@@ -0,0 +1,168 @@
+"""Предрасчитанные рейтинги произведений для лидерборда.
+
+Для каждого произведения в таблице `TitleRanking` хранятся строки
+по всем его областям (все произведения, каждый жанр, категория)
+и периодам. При изменении отзывов и произведения пересчитываются
+только строки этого произведения; выход отзывов за границу недели
+учитывается командой `refresh_rankings`, которую нужно запускать
+по расписанию.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews import stamps
+from reviews.deferred import on_commit_for_ids
+from reviews.models import (
+    MAX_SCORE, RANKING_ALL_TIME, RANKING_GLOBAL_SCOPE, RANKING_WEEK,
+    Review, Title, TitleRanking
+)
+
+TRENDING_PERIOD = timedelta(days=7)
+# Множитель старшей части веса: число отзывов за всё время
+# и рейтинг не достигают его, поэтому не перебивают старшую часть.
+SCORE_BASE = 10 ** 9
+BATCH_SIZE = 1000
+
+
+def genre_scope(genre_id):
+    return f'genre:{genre_id}'
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def week_start():
+    return timezone.now() - TRENDING_PERIOD
+
+
+def with_week_reviews(titles):
+    """Добавить к произведениям число отзывов за последнюю неделю."""
+    return titles.annotate(week_reviews=Coalesce(Subquery(
+        Review.objects.filter(
+            title=OuterRef('pk'), pub_date__gte=week_start()
+        ).order_by().values('title').annotate(
+            value=Count('pk')
+        ).values('value'),
+        output_field=IntegerField()
+    ), 0))
+
+
+def ranking_rows(title_id, rating, reviews_count, week_reviews,
+                 category_id, genre_ids):
+    """Строки рейтинга одного произведения."""
+    windows = []
+    if rating is not None:
+        windows.append((
+            RANKING_ALL_TIME,
+            rating * SCORE_BASE + min(reviews_count, SCORE_BASE - 1),
+            reviews_count
+        ))
+    if week_reviews:
+        windows.append((
+            RANKING_WEEK,
+            week_reviews * (MAX_SCORE + 1) + (rating or 0),
+            week_reviews
+        ))
+    scopes = [RANKING_GLOBAL_SCOPE, *map(genre_scope, genre_ids)]
+    if category_id is not None:
+        scopes.append(category_scope(category_id))
+    return [
+        TitleRanking(
+            window=window,
+            scope=scope,
+            title_id=title_id,
+            score=score,
+            reviews_count=count
+        )
+        for window, score, count in windows
+        for scope in scopes
+    ]
+
+
+def refresh_titles(title_ids):
+    """Пересчитать строки рейтинга произведений в одной транзакции.
+
+    Произведения блокируются по возрастанию id, чтобы параллельные
+    пересчёты не ждали друг друга по кругу.
+    """
+    with transaction.atomic():
+        stamps.bump(stamps.RANKINGS)
+        for title_id in sorted(title_ids):
+            refresh_title(title_id)
+
+
+def refresh_title(title_id):
+    """Пересчитать строки рейтинга одного произведения.
+
+    Вызывается внутри транзакции. Строка произведения блокируется
+    до удаления старых строк рейтинга, поэтому параллельный пересчёт
+    того же произведения дождётся коммита и не нарушит
+    `unique_title_ranking`.
+    """
+    title = with_week_reviews(
+        Title.objects.select_for_update().filter(pk=title_id)
+    ).values(
+        'rating', 'reviews_count', 'week_reviews', 'category_id'
+    ).first()
+    TitleRanking.objects.filter(title_id=title_id).delete()
+    if title is None or (
+        title['rating'] is None and not title['week_reviews']
+    ):
+        return
+    TitleRanking.objects.bulk_create(ranking_rows(
+        title_id,
+        genre_ids=Title.genre.through.objects.filter(
+            title_id=title_id
+        ).values_list('genre_id', flat=True),
+        **title
+    ))
+
+
+def refresh_on_commit(*title_ids):
+    """Пересчитать рейтинги произведений после коммита транзакции.
+
+    К этому моменту рейтинг произведения уже обновлён, а удалённое
+    вместе с отзывами произведение уже отсутствует в БД. Повторные
+    вызовы в одной транзакции пересчитывают каждое произведение один раз.
+    """
+    on_commit_for_ids(refresh_titles, title_ids)
+
+
+def remove_scope(scope):
+    stamps.bump(stamps.RANKINGS)
+    TitleRanking.objects.filter(scope=scope).delete()
+
+
+def rebuild_rankings():
+    """Построить таблицу рейтингов заново.
+
+    Возвращает количество записанных строк.
+    """
+    genres = defaultdict(list)
+    for title_id, genre_id in Title.genre.through.objects.values_list(
+        'title_id', 'genre_id'
+    ).iterator(chunk_size=BATCH_SIZE):
+        genres[title_id].append(genre_id)
+    titles = with_week_reviews(Title.objects.all()).values_list(
+        'pk', 'rating', 'reviews_count', 'week_reviews', 'category_id'
+    )
+    written = 0
+    with transaction.atomic():
+        TitleRanking.objects.all().delete()
+        batch = []
+        for title_id, *values in titles.iterator(chunk_size=BATCH_SIZE):
+            batch.extend(ranking_rows(title_id, *values, genres[title_id]))
+            if len(batch) >= BATCH_SIZE:
+                TitleRanking.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        TitleRanking.objects.bulk_create(batch)
+        written += len(batch)
+        stamps.bump(stamps.RANKINGS)
+    return written
@@ -0,0 +1,63 @@
+"""Поддержка денормализованного рейтинга произведений.
+
+Рейтинг хранится в полях `Title.rating`, `Title.reviews_count`
+и `Title.score_sum` и обновляется инкрементально при изменении отзывов,
+поэтому при чтении произведений не нужно агрегировать таблицу отзывов.
+"""
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from reviews.models import Review, Title
+
+
+def apply_review_delta(title_id, count_delta, score_delta):
+    """Атомарно изменить счётчики произведения на заданные приращения.
+
+    Если счётчики разошлись с отзывами (например, отзывы загружены
+    в обход сигналов) и ушли бы ниже нуля, рейтинг произведения
+    пересчитывается по таблице отзывов.
+    """
+    titles = Title.objects.filter(pk=title_id)
+    new_count = F('reviews_count') + count_delta
+    new_sum = F('score_sum') + score_delta
+    if not titles.filter(
+        reviews_count__gte=-count_delta, score_sum__gte=-score_delta
+    ).update(
+        reviews_count=new_count,
+        score_sum=new_sum,
+        rating=Case(
+            When(reviews_count__lte=-count_delta, then=None),
+            default=new_sum / new_count,
+        ),
+        updated_at=timezone.now(),
+    ) and (count_delta < 0 or score_delta < 0):
+        rebuild_ratings(titles)
+
+
+def rebuild_ratings(queryset=None):
+    """Пересчитать рейтинг с нуля по таблице отзывов.
+
+    Выполняется одним UPDATE с коррелированными подзапросами; используется
+    после массовой загрузки данных и для исправления расхождений.
+    Возвращает количество обновлённых произведений.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    count = Coalesce(
+        Subquery(reviews.annotate(value=Count('pk')).values('value')), 0
+    )
+    score_sum = Coalesce(
+        Subquery(reviews.annotate(value=Sum('score')).values('value')), 0
+    )
+    updated = queryset.update(reviews_count=count, score_sum=score_sum)
+    queryset.update(
+        rating=Case(
+            When(reviews_count=0, then=None),
+            default=F('score_sum') / F('reviews_count'),
+        )
+    )
+    return updated
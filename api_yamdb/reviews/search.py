@@ -0,0 +1,164 @@
+"""Полнотекстовый поиск по произведениям.
+
+Название и описание индексируются в виде основ слов (русские слова
+обрабатываются стеммером Snowball), поэтому «терминатора» находит
+«Терминатор». Бэкенд задаётся настройкой `TITLE_SEARCH_BACKEND`;
+по умолчанию на SQLite используется виртуальная таблица FTS5,
+на остальных СУБД — поиск подстроки без индекса.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from reviews.models import Title
+from reviews.stemmer import stem
+
+WORD_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-яё]')
+REBUILD_BATCH_SIZE = 1000
+
+
+def normalize(text):
+    """Основы слов текста в нижнем регистре."""
+    return [
+        stem(word) if CYRILLIC_RE.search(word) else word
+        for word in WORD_RE.findall((text or '').lower())
+    ]
+
+
+class BaseSearchBackend:
+    """Интерфейс бэкенда поиска по произведениям."""
+
+    def setup(self):
+        """Создать структуры индекса, если их ещё нет."""
+
+    def index(self, titles):
+        """Добавить или обновить произведения в индексе."""
+
+    def remove(self, title_ids):
+        """Удалить произведения из индекса."""
+
+    def rebuild(self):
+        """Построить индекс заново по таблице произведений."""
+
+    def search(self, queryset, query):
+        """Отфильтровать произведения по запросу и упорядочить по рангу."""
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Поиск подстроки в названии и описании, без индекса."""
+
+    def search(self, queryset, query):
+        for term in query.split():
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(description__icontains=term)
+            )
+        return queryset
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """Индекс в виртуальной таблице SQLite FTS5 с ранжированием BM25.
+
+    В таблицу записываются основы слов, `rowid` совпадает с id
+    произведения. Совпадение в названии весит больше, чем в описании.
+    """
+
+    table = 'reviews_title_fts'
+    name_weight = 10.0
+    description_weight = 1.0
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                'USING fts5(name, description, '
+                "tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, titles):
+        rows = [
+            (title.pk, ' '.join(normalize(title.name)),
+             ' '.join(normalize(title.description)))
+            for title in titles
+        ]
+        self.remove([row[0] for row in rows])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, name, description) '
+                'VALUES (%s, %s, %s)',
+                rows
+            )
+
+    def remove(self, title_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(title_id,) for title_id in title_ids]
+            )
+
+    def rebuild(self):
+        self.setup()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        batch = []
+        for title in Title.objects.only(
+            'name', 'description'
+        ).iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(title)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                self.index(batch)
+                batch = []
+        self.index(batch)
+
+    def match_expression(self, query):
+        """Запрос FTS5: все основы слов запроса, с поиском по префиксу."""
+        terms = normalize(query)
+        if not terms:
+            return None
+        return ' AND '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset
+        title_table = queryset.model._meta.db_table
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s',
+            (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT bm25({self.table}, {self.name_weight}, '
+            f'{self.description_weight}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s '
+            f'AND {self.table}.rowid = {title_table}.id',
+            (match,)
+        )).order_by(
+            'search_rank',
+            *(queryset.query.order_by or queryset.model._meta.ordering)
+        )
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Экземпляр бэкенда из `TITLE_SEARCH_BACKEND` или по типу СУБД."""
+    path = getattr(settings, 'TITLE_SEARCH_BACKEND', None)
+    if path is None:
+        path = (
+            'reviews.search.SQLiteFTS5Backend'
+            if connection.vendor == 'sqlite'
+            else 'reviews.search.SimpleSearchBackend'
+        )
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    if setting == 'TITLE_SEARCH_BACKEND':
+        get_search_backend.cache_clear()
@@ -0,0 +1,201 @@
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_init, post_migrate, post_save
+)
+from django.dispatch import receiver
+
+from reviews import bitmaps, rankings, stamps, statistics
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.ratings import apply_review_delta, rebuild_ratings
+from reviews.search import get_search_backend
+
+
+def remember_score(review):
+    """Запомнить сохранённые в БД произведение и оценку отзыва.
+
+    Значения берутся из `__dict__`, чтобы не подгружать отложенные поля:
+    если их нет, при сохранении рейтинг произведения пересчитывается.
+    """
+    if review.pk is None:
+        review._saved_score = None
+        return
+    review._saved_score = (
+        review.__dict__.get('title_id'), review.__dict__.get('score')
+    )
+
+
+def deleted_with_title(origin):
+    """Удаление началось с произведения, и отзыв удаляется каскадом.
+
+    Счётчики и рейтинги такого произведения обновлять незачем.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, Title)
+
+
+def recount(title_id):
+    rebuild_ratings(Title.objects.filter(pk=title_id))
+    statistics.recount_scores(title_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def review_changed(sender, instance, raw=False, origin=None, **kwargs):
+    """Отзывы произведения изменились, а с ними и его рейтинг.
+
+    Подключается раньше `review_saved`, пока `_saved_score` ещё
+    хранит прежнее произведение отзыва.
+    """
+    if raw or deleted_with_title(origin):
+        return
+    keys = {stamps.TITLES, stamps.reviews_key(instance.title_id)}
+    previous = getattr(instance, '_saved_score', None)
+    if previous is not None and previous[0] is not None:
+        keys.add(stamps.reviews_key(previous[0]))
+    stamps.bump(*sorted(keys))
+
+
+@receiver(post_init, sender=Review)
+def review_initialized(sender, instance, **kwargs):
+    remember_score(instance)
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    """Обновить рейтинг произведения после создания или изменения отзыва."""
+    if raw:
+        return
+    previous = None if created else instance._saved_score
+    if previous is None:
+        apply_review_delta(instance.title_id, 1, instance.score)
+        statistics.apply_score_delta(instance.title_id, instance.score, 1)
+    elif None in previous:
+        if previous[0] not in (None, instance.title_id):
+            recount(previous[0])
+        recount(instance.title_id)
+    elif previous[0] != instance.title_id:
+        apply_review_delta(previous[0], -1, -previous[1])
+        apply_review_delta(instance.title_id, 1, instance.score)
+        statistics.apply_score_delta(previous[0], previous[1], -1)
+        statistics.apply_score_delta(instance.title_id, instance.score, 1)
+    elif previous[1] != instance.score:
+        apply_review_delta(instance.title_id, 0, instance.score - previous[1])
+        statistics.apply_score_delta(instance.title_id, previous[1], -1)
+        statistics.apply_score_delta(instance.title_id, instance.score, 1)
+    rankings.refresh_on_commit(
+        instance.title_id, previous[0] if previous else None
+    )
+    remember_score(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    """Вычесть оценку удалённого отзыва из рейтинга произведения."""
+    previous = instance._saved_score
+    if previous is None or deleted_with_title(origin):
+        return
+    if None in previous:
+        recount(previous[0] or instance.__dict__.get('title_id'))
+    else:
+        apply_review_delta(previous[0], -1, -previous[1])
+        statistics.apply_score_delta(previous[0], previous[1], -1)
+    rankings.refresh_on_commit(
+        previous[0] or instance.__dict__.get('title_id')
+    )
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    get_search_backend().index([instance])
+    rankings.refresh_on_commit(instance.pk)
+    bitmaps.refresh_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+    bitmaps.refresh_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, **kwargs):
+    stamps.bump(stamps.TITLES, stamps.RANKINGS)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    stamps.bump(stamps.TITLES)
+    if not reverse:
+        rankings.refresh_on_commit(instance.pk)
+        bitmaps.refresh_on_commit(instance.pk)
+    elif pk_set is not None:
+        rankings.refresh_on_commit(*pk_set)
+        bitmaps.refresh_on_commit(*pk_set)
+    else:
+        rankings.remove_scope(rankings.genre_scope(instance.pk))
+        bitmaps.reset_on_commit()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def genre_changed(sender, **kwargs):
+    stamps.bump(stamps.TITLES, stamps.GENRES, stamps.RANKINGS)
+    bitmaps.reset_on_commit()
+
+
+@receiver(post_delete, sender=Genre)
+def genre_deleted(sender, instance, **kwargs):
+    rankings.remove_scope(rankings.genre_scope(instance.pk))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    stamps.bump(stamps.TITLES, stamps.CATEGORIES, stamps.RANKINGS)
+    bitmaps.reset_on_commit()
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    rankings.remove_scope(rankings.category_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stamps.bump(stamps.comments_key(instance.review_id))
+
+
+@receiver(post_init, sender=User)
+def user_initialized(sender, instance, **kwargs):
+    instance._saved_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, raw=False, **kwargs):
+    """Имя автора выводится в его отзывах и комментариях."""
+    previous = instance._saved_username
+    username = instance._saved_username = instance.__dict__.get('username')
+    if created or raw or previous == username:
+        return
+    stamps.bump(
+        *map(stamps.reviews_key, Review.objects.filter(
+            author=instance
+        ).values_list('title_id', flat=True).distinct()),
+        *map(stamps.comments_key, Comment.objects.filter(
+            author=instance
+        ).values_list('review_id', flat=True).distinct())
+    )
+
+
+@receiver(post_migrate)
+def database_migrated(sender, **kwargs):
+    """Создать поисковый индекс после migrate и очистить его после flush."""
+    if sender.name == 'reviews':
+        get_search_backend().rebuild()
+        bitmaps.reset_title_index()
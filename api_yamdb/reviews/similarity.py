@@ -0,0 +1,216 @@
+"""Похожие произведения по оценкам пользователей.
+
+Отзывы образуют разреженную матрицу оценок пользователь × произведение.
+Близость двух произведений — косинус между их столбцами: скалярное
+произведение оценок общих рецензентов, делённое на нормы столбцов.
+Для каждого произведения в таблице `SimilarTitle` хранятся
+`SIMILAR_TITLES_COUNT` самых близких. Таблица пересчитывается командой
+`refresh_similar_titles`: по умолчанию только для произведений, отзывы
+которых изменились с прошлого запуска, и тех, с кем у них есть общие
+рецензенты. Если рецензент удалил отзыв, произведения, связанные только
+через него, обновятся при полном пересчёте (`--full`).
+"""
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from reviews.models import RefreshCheckpoint, Review, SimilarTitle, Title
+
+DEFAULT_SIMILAR_TITLES_COUNT = 10
+BATCH_SIZE = 100000
+# Сколько пар отзывов обрабатывать за раз: ограничивает память
+# на временные массивы (около 50 байт на пару).
+PAIRS_CHUNK_SIZE = 5000000
+# Задача в `RefreshCheckpoint`: время начала последнего пересчёта.
+REFRESH_KEY = 'similar-titles'
+
+
+def get_similar_titles_count():
+    return getattr(
+        settings, 'SIMILAR_TITLES_COUNT', DEFAULT_SIMILAR_TITLES_COUNT
+    )
+
+
+class ScoreMatrix:
+    """Матрица оценок в формате CSR: отзывы упорядочены по авторам.
+
+    Для каждого отзыва хранится начало и длина строки его автора, так что
+    все пары отзывов одного автора строятся без циклов Python.
+    """
+
+    def __init__(self, authors, titles, scores):
+        order = np.lexsort((titles, authors))
+        authors = authors[order]
+        self.titles = titles[order]
+        self.scores = scores[order].astype(np.float64)
+        starts = np.flatnonzero(np.diff(authors, prepend=-1))
+        lengths = np.diff(starts, append=len(authors))
+        self.row_start = np.repeat(starts, lengths)
+        self.row_length = np.repeat(lengths, lengths)
+        self.width = int(self.titles.max()) + 1 if len(self.titles) else 1
+        self.norms = np.sqrt(np.bincount(
+            self.titles, weights=self.scores ** 2, minlength=self.width
+        ))
+
+    @classmethod
+    def from_db(cls, batch_size=BATCH_SIZE):
+        chunks = []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT author_id, title_id, score '
+                f'FROM {Review._meta.db_table}'
+            )
+            while rows := cursor.fetchmany(batch_size):
+                chunks.append(np.array(rows, dtype=np.int64).reshape(-1, 3))
+        rows = np.concatenate(chunks) if chunks else np.empty((0, 3), np.int64)
+        return cls(rows[:, 0], rows[:, 1], rows[:, 2])
+
+    def neighbours(self, title_ids):
+        """Произведения с общими рецензентами, включая сами `title_ids`."""
+        left = np.flatnonzero(np.isin(self.titles, title_ids))
+        right = pair_indexes(self.row_start[left], self.row_length[left])
+        return np.union1d(title_ids, self.titles[right])
+
+    def similarities(self, title_ids):
+        """Ненулевые близости `title_ids` со всеми произведениями.
+
+        Возвращает массивы произведений, похожих произведений и близостей.
+        """
+        left = np.flatnonzero(np.isin(self.titles, title_ids))
+        lengths = self.row_length[left]
+        right = pair_indexes(self.row_start[left], lengths)
+        left = np.repeat(left, lengths)
+        distinct = self.titles[left] != self.titles[right]
+        left, right = left[distinct], right[distinct]
+        keys, inverse = np.unique(
+            self.titles[left] * self.width + self.titles[right],
+            return_inverse=True
+        )
+        dots = np.bincount(
+            inverse, weights=self.scores[left] * self.scores[right]
+        )
+        titles, similar = keys // self.width, keys % self.width
+        norms = self.norms[titles] * self.norms[similar]
+        return titles, similar, dots / norms
+
+    def top_similar(self, title_ids, count):
+        """Не больше `count` самых близких произведений для `title_ids`.
+
+        Произведения обрабатываются частями, чтобы число пар отзывов
+        в одной части не превышало `PAIRS_CHUNK_SIZE`.
+        """
+        title_ids = np.unique(title_ids)
+        if not len(title_ids):
+            return
+        pairs = np.cumsum(np.bincount(
+            self.titles,
+            weights=self.row_length,
+            minlength=max(self.width, title_ids[-1] + 1)
+        )[title_ids])
+        bounds = np.searchsorted(
+            pairs, np.arange(PAIRS_CHUNK_SIZE, pairs[-1], PAIRS_CHUNK_SIZE)
+        )
+        for chunk in np.split(title_ids, np.unique(bounds)):
+            if len(chunk):
+                yield top_rows(*self.similarities(chunk), count)
+
+
+def pair_indexes(starts, lengths):
+    """Индексы всех отзывов строк, заданных началами и длинами."""
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return np.repeat(starts, lengths) + offsets
+
+
+def top_rows(titles, similar, scores, count):
+    """Оставить для каждого произведения `count` строк с наибольшей
+    близостью; при равной близости выше произведение с меньшим id.
+
+    Строки уже упорядочены по произведению и похожему произведению,
+    поэтому хватает одной устойчивой сортировки по ключу
+    `2 * произведение - близость` (близость не больше 1) — это в разы
+    быстрее `np.lexsort` по трём ключам.
+    """
+    order = np.argsort(titles * 2.0 - scores, kind='stable')
+    titles, similar, scores = titles[order], similar[order], scores[order]
+    starts = np.flatnonzero(np.diff(titles, prepend=-1))
+    ranks = np.arange(len(titles)) - np.repeat(
+        starts, np.diff(starts, append=len(titles))
+    )
+    top = ranks < count
+    return titles[top], similar[top], scores[top]
+
+
+def delete_rows(title_ids, batch_size=500):
+    """Удалить строки произведений одним DELETE на пачку."""
+    for start in range(0, len(title_ids), batch_size):
+        SimilarTitle.objects.filter(
+            title_id__in=title_ids[start:start + batch_size]
+        ).delete()
+
+
+def last_refresh():
+    return RefreshCheckpoint.objects.filter(name=REFRESH_KEY).values_list(
+        'started_at', flat=True
+    ).first()
+
+
+def changed_titles(since):
+    """Произведения, отзывы которых менялись начиная с `since`.
+
+    `Title.updated_at` обновляется при любом изменении отзывов, включая
+    удаление; отзывы, пересчитанные целиком, видны по своей дате изменения.
+    """
+    return np.array(
+        Title.objects.filter(
+            Q(updated_at__gte=since)
+            | Q(pk__in=Review.objects.filter(
+                updated_at__gte=since
+            ).values('title_id'))
+        ).values_list('pk', flat=True),
+        dtype=np.int64
+    )
+
+
+def refresh_similar_titles(full=False, count=None, batch_size=BATCH_SIZE):
+    """Пересчитать похожие произведения.
+
+    Без `full` пересчитываются только произведения, затронутые
+    изменениями с прошлого запуска. Возвращает количество пересчитанных
+    произведений и записанных строк.
+    """
+    started = timezone.now()
+    since = None if full else last_refresh()
+    if count is None:
+        count = get_similar_titles_count()
+    matrix = ScoreMatrix.from_db(batch_size)
+    if since is None:
+        title_ids = np.array(
+            Title.objects.values_list('pk', flat=True), dtype=np.int64
+        )
+    else:
+        title_ids = matrix.neighbours(changed_titles(since))
+    written = 0
+    with transaction.atomic():
+        if since is None:
+            SimilarTitle.objects.all().delete()
+        else:
+            delete_rows(title_ids.tolist())
+        for titles, similar, scores in matrix.top_similar(title_ids, count):
+            SimilarTitle.objects.bulk_create(
+                (
+                    SimilarTitle(title_id=title, similar_id=other, score=score)
+                    for title, other, score in zip(
+                        titles.tolist(), similar.tolist(), scores.tolist()
+                    )
+                ),
+                batch_size=1000
+            )
+            written += len(titles)
+        RefreshCheckpoint.objects.update_or_create(
+            name=REFRESH_KEY, defaults={'started_at': started}
+        )
+    return len(title_ids), written
@@ -0,0 +1,76 @@
+"""Версии коллекций для ETag и Last-Modified.
+
+Каждой коллекции (все произведения, отзывы к произведению, комментарии
+к отзыву и т. д.) соответствует строка `VersionStamp`. Сигналы
+увеличивают версию в той же транзакции, что и изменение данных, поэтому
+версия видна всем процессам. Строки создаются только при записи:
+для коллекции, которую ещё никто не менял, версия вычисляется при чтении
+по дате последнего изменения её объектов.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from reviews.models import VersionStamp
+
+TITLES = 'titles'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+RANKINGS = 'rankings'
+# Дата версии пустой коллекции, которую ещё никто не менял.
+EPOCH = datetime.fromtimestamp(0, dt_timezone.utc)
+
+
+def reviews_key(title_id):
+    return f'reviews:{title_id}'
+
+
+def comments_key(review_id):
+    return f'comments:{review_id}'
+
+
+def bump(*keys):
+    """Увеличить версии коллекций; недостающие строки создаются."""
+    now = timezone.now()
+    keys = set(keys)
+    if VersionStamp.objects.filter(key__in=keys).update(
+        version=F('version') + 1, updated_at=now
+    ) < len(keys):
+        VersionStamp.objects.bulk_create(
+            (VersionStamp(key=key, updated_at=now) for key in keys),
+            ignore_conflicts=True
+        )
+
+
+def bump_all(prefixes=None):
+    """Увеличить версии всех коллекций или коллекций с префиксами.
+
+    Нужна после изменений в обход сигналов, например массовой загрузки.
+    """
+    stamps = VersionStamp.objects.all()
+    if prefixes is not None:
+        condition = Q()
+        for prefix in prefixes:
+            condition |= Q(key__startswith=prefix)
+        stamps = stamps.filter(condition)
+    stamps.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def get_stamp(key, queryset):
+    """Версия коллекции; `queryset` — её объекты с полем `updated_at`.
+
+    Если строки ещё нет, возвращается несохранённая версия 0 с датой
+    последнего изменения объектов: запросы на чтение ничего не пишут в БД.
+    """
+    stamp = VersionStamp.objects.filter(key=key).first()
+    if stamp is not None:
+        return stamp
+    updated_at = queryset.aggregate(
+        updated_at=Max('updated_at')
+    )['updated_at']
+    return VersionStamp(
+        key=key,
+        version=0,
+        updated_at=updated_at or EPOCH
+    )
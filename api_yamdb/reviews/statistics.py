@@ -0,0 +1,139 @@
+"""Распределение оценок произведений.
+
+Для каждого произведения в `ScoreCount` хранится не больше
+`MAX_SCORE - MIN_SCORE + 1` счётчиков — по одному на оценку. Они
+обновляются вместе с рейтингом при записи отзывов, а статистика
+(среднее, медиана, гистограмма) считается по ним без чтения отзывов.
+"""
+import numpy as np
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+
+from reviews.models import MAX_SCORE, MIN_SCORE, Review, ScoreCount
+
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+BATCH_SIZE = 100000
+
+
+def apply_score_delta(title_id, score, delta):
+    """Атомарно изменить счётчик оценки произведения.
+
+    Если счётчик ушёл бы ниже нуля, счётчики произведения
+    пересчитываются по таблице отзывов.
+    """
+    counts = ScoreCount.objects.filter(title_id=title_id, score=score)
+    if delta < 0:
+        if not counts.filter(count__gte=-delta).update(
+            count=F('count') + delta
+        ):
+            recount_scores(title_id)
+        return
+    if counts.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            ScoreCount.objects.create(
+                title_id=title_id, score=score, count=delta
+            )
+    except IntegrityError:
+        counts.update(count=F('count') + delta)
+
+
+def recount_scores(title_id):
+    """Пересчитать счётчики произведения по таблице отзывов."""
+    ScoreCount.objects.filter(title_id=title_id).delete()
+    ScoreCount.objects.bulk_create(
+        ScoreCount(title_id=title_id, score=score, count=count)
+        for score, count in Review.objects.filter(
+            title_id=title_id
+        ).order_by().values('score').annotate(
+            count=Count('pk')
+        ).values_list('score', 'count')
+    )
+
+
+def read_scores(batch_size=BATCH_SIZE):
+    """Пары (произведение, оценка) всех отзывов в виде массивов NumPy."""
+    chunks = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT title_id, score FROM {Review._meta.db_table}'
+        )
+        while rows := cursor.fetchmany(batch_size):
+            chunks.append(np.array(rows, dtype=np.int64).reshape(-1, 2))
+    if not chunks:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    pairs = np.concatenate(chunks)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def count_scores(title_ids, scores):
+    """Счётчики оценок по массивам отзывов.
+
+    Пара (произведение, оценка) кодируется одним целым, после чего
+    все счётчики находятся одним `np.unique`. Возвращает массивы
+    произведений, оценок и количеств.
+    """
+    width = len(SCORES)
+    keys, counts = np.unique(
+        title_ids * width + (scores - MIN_SCORE), return_counts=True
+    )
+    return keys // width, keys % width + MIN_SCORE, counts
+
+
+def rebuild_score_counts(batch_size=BATCH_SIZE):
+    """Построить таблицу счётчиков заново по всем отзывам.
+
+    Возвращает количество отзывов и записанных счётчиков.
+    """
+    title_ids, scores = read_scores(batch_size)
+    rows = [column.tolist() for column in count_scores(title_ids, scores)]
+    with transaction.atomic():
+        ScoreCount.objects.all().delete()
+        ScoreCount.objects.bulk_create(
+            (
+                ScoreCount(title_id=title_id, score=score, count=count)
+                for title_id, score, count in zip(*rows)
+            ),
+            batch_size=1000
+        )
+    return len(scores), len(rows[0])
+
+
+def score_statistics(counts):
+    """Количество, среднее, медиана и гистограмма по счётчикам оценок.
+
+    `counts` — словарь {оценка: количество}.
+    """
+    histogram = [
+        {'score': score, 'count': counts.get(score, 0)} for score in SCORES
+    ]
+    total = sum(bucket['count'] for bucket in histogram)
+    if not total:
+        return {
+            'count': 0, 'mean': None, 'median': None, 'histogram': histogram
+        }
+    middle = []
+    seen = 0
+    for bucket in histogram:
+        previous, seen = seen, seen + bucket['count']
+        for position in {(total - 1) // 2, total // 2}:
+            if previous <= position < seen:
+                middle.append(bucket['score'])
+    return {
+        'count': total,
+        'mean': round(sum(
+            bucket['score'] * bucket['count'] for bucket in histogram
+        ) / total, 2),
+        'median': sum(middle) / len(middle),
+        'histogram': histogram,
+    }
+
+
+def title_statistics(title_id):
+    """Статистика оценок произведения по его счётчикам."""
+    return score_statistics(dict(
+        ScoreCount.objects.filter(title_id=title_id).values_list(
+            'score', 'count'
+        )
+    ))
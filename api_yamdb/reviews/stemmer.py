@@ -0,0 +1,111 @@
+"""Стеммер Snowball для русского языка.
+
+Реализация алгоритма
+https://snowballstem.org/algorithms/russian/stemmer.html
+для полнотекстового поиска по произведениям.
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND_1 = ('в', 'вши', 'вшись')
+PERFECTIVE_GERUND_2 = ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись')
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею'
+)
+PARTICIPLE_1 = ('ем', 'нн', 'вш', 'ющ', 'щ')
+PARTICIPLE_2 = ('ивш', 'ывш', 'ующ')
+REFLEXIVE = ('ся', 'сь')
+VERB_1 = (
+    'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+    'ют', 'ны', 'ть', 'ешь', 'нно'
+)
+VERB_2 = (
+    'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+    'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+    'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я'
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def remove_ending(word, start, endings, preceded_endings=()):
+    """Удалить самое длинное окончание, лежащее в области `word[start:]`.
+
+    Окончания из `preceded_endings` удаляются, только если перед ними
+    стоит «а» или «я». Возвращает None, если окончание не найдено.
+    """
+    region = word[start:]
+    candidates = [(ending, False) for ending in endings]
+    candidates += [(ending, True) for ending in preceded_endings]
+    for ending, preceded in sorted(
+        candidates, key=lambda item: len(item[0]), reverse=True
+    ):
+        if not region.endswith(ending):
+            continue
+        stem = word[:len(word) - len(ending)]
+        if preceded and not (len(stem) > start and stem[-1] in 'ая'):
+            return None
+        return stem
+    return None
+
+
+def regions(word):
+    """Начала областей RV и R2 слова."""
+    rv = r1 = r2 = len(word)
+    for index, char in enumerate(word):
+        if char in VOWELS:
+            rv = index + 1
+            break
+    for index in range(1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r1 = index + 1
+            break
+    for index in range(r1 + 1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def stem(word):
+    """Основа русского слова в нижнем регистре."""
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = regions(word)
+
+    result = remove_ending(
+        word, rv, PERFECTIVE_GERUND_2, PERFECTIVE_GERUND_1
+    )
+    if result is None:
+        word = remove_ending(word, rv, REFLEXIVE) or word
+        result = remove_ending(word, rv, ADJECTIVE)
+        if result is not None:
+            result = remove_ending(
+                result, rv, PARTICIPLE_2, PARTICIPLE_1
+            ) or result
+        else:
+            result = (
+                remove_ending(word, rv, VERB_2, VERB_1)
+                or remove_ending(word, rv, NOUN)
+            )
+    word = result if result is not None else word
+
+    if word[rv:].endswith('и'):
+        word = word[:-1]
+    word = remove_ending(word, max(r2, rv), DERIVATIONAL) or word
+
+    if word[rv:].endswith('нн'):
+        return word[:-1]
+    superlative = remove_ending(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        return word[:-1] if word[rv:].endswith('нн') else word
+    if word[rv:].endswith('ь'):
+        return word[:-1]
+    return word
@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08StoredRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_title(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        assert self.get_title(client, title_id)['rating'] == 5, (
+            'Проверьте, что рейтинг произведения обновляется при создании '
+            'отзыва.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(client, title_id)['rating'] == 7, (
+            'Проверьте, что рейтинг произведения обновляется при изменении '
+            'оценки в отзыве.'
+        )
+
+        for review in reviews:
+            admin_client.delete(
+                self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                    title_id=title_id, review_id=review['id']
+                )
+            )
+        assert self.get_title(client, title_id)['rating'] is None, (
+            'Проверьте, что после удаления всех отзывов рейтинг произведения '
+            'равен `None`.'
+        )
+
+    def test_02_rebuild_ratings_command(self, client, admin_client, admin,
+                                        user_client, user):
+        from reviews.models import Title
+
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        Title.objects.update(rating=None, reviews_count=0, score_sum=0)
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating, title.reviews_count, title.score_sum) == (
+            5, 2, 10
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг '
+            'произведений по таблице отзывов.'
+        )
+
+    def test_03_counters_without_signals(self, user, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Review, ScoreCount, Title
+
+        title = Title.objects.create(name='Title', year=2000)
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='text', score=score)
+            for author, score in ((user, 4), (admin, 8))
+        )
+        Review.objects.get(author=user).delete()
+        title.refresh_from_db()
+        assert (title.rating, title.reviews_count, title.score_sum) == (
+            8, 1, 8
+        ), (
+            'Проверьте, что удаление отзыва, загруженного в обход сигналов, '
+            'пересчитывает рейтинг вместо ухода счётчиков ниже нуля.'
+        )
+        assert dict(ScoreCount.objects.filter(
+            title=title
+        ).values_list('score', 'count')) == {8: 1}
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        assert not any(
+            query['sql'].startswith(
+                ('UPDATE "reviews_title"', 'UPDATE "reviews_scorecount"')
+            )
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что при удалении произведения счётчики не '
+            'обновляются для каждого его отзыва.'
+        )
+
+    def test_04_review_saved_with_counters(self, monkeypatch, user_client):
+        from reviews import statistics
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Title', year=2000)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError
+
+        monkeypatch.setattr(statistics, 'apply_score_delta', fail)
+        with pytest.raises(RuntimeError):
+            user_client.post(
+                f'/api/v1/titles/{title.pk}/reviews/',
+                data={'text': 'text', 'score': 5}
+            )
+        title.refresh_from_db()
+        assert not Review.objects.exists() and title.reviews_count == 0, (
+            'Проверьте, что отзыв и счётчики произведения записываются '
+            'в одной транзакции.'
+        )
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitlesCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_repeated_list_served_from_cache(
+        self, client, admin_client, django_assert_num_queries
+    ):
+        create_titles(admin_client)
+        url = f'{self.TITLES_URL}?limit=5&offset=0'
+        first = client.get(url)
+        assert first.status_code == HTTPStatus.OK
+        with django_assert_num_queries(0):
+            second = client.get(f'{self.TITLES_URL}?offset=0&limit=5')
+        assert second.json() == first.json(), (
+            'Проверьте, что повторный GET-запрос к `/api/v1/titles/` с теми '
+            'же параметрами возвращает ответ из кэша.'
+        )
+
+    def test_02_cache_invalidated_on_review(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        create_single_review(admin_client, titles[0]['id'], 'text', 8)
+        assert client.get(url).json()['rating'] == 8, (
+            'Проверьте, что кэш произведений сбрасывается при создании '
+            'отзыва.'
+        )
+
+    def test_03_unrelated_models_fast_deleted(self):
+        from reviews.models import OutgoingEmail
+
+        OutgoingEmail.objects.bulk_create(
+            OutgoingEmail(
+                subject='subject', body='body', from_email='a@yamdb.fake',
+                recipients=['b@yamdb.fake']
+            )
+            for _ in range(3)
+        )
+        with CaptureQueriesContext(connection) as context:
+            OutgoingEmail.objects.all().delete()
+        assert [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(('BEGIN', 'COMMIT'))
+        ] == ['DELETE FROM "reviews_outgoingemail"'], (
+            'Проверьте, что сброс кэша произведений подключён только '
+            'к связанным моделям и не мешает удалению остальных одним '
+            'запросом.'
+        )
+
+
+def test_lru_cache_limits():
+    from api.cache import LocMemLRUCache
+
+    cache = LocMemLRUCache(MAX_ENTRIES=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    version = cache.get_version()
+    cache.bump_version()
+    assert cache.get_version() == version + 1
@@ -0,0 +1,209 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import stamps
+from reviews.models import Comment, Review, Title
+from tests.utils import create_authors
+
+
+def count_queries(client, url):
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return len(context.captured_queries), response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryCount:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.mark.parametrize('rows', (1, 10))
+    def test_01_reviews_list(self, client, rows):
+        title = Title.objects.create(name='Title', year=2000)
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='text', score=5)
+            for author in create_authors(rows)
+        )
+        # bulk_create обходит сигналы, которые создают строку версии.
+        stamps.bump(stamps.reviews_key(title.id))
+        queries, data = count_queries(
+            client, self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        )
+        assert len(data['results']) == rows
+        assert queries <= 4, (
+            f'Проверьте, что GET-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+            'выполняет постоянное число запросов к БД, независимо от '
+            f'количества отзывов на странице. Выполнено: {queries}.'
+        )
+
+    @pytest.mark.parametrize('rows', (1, 10))
+    def test_02_comments_list(self, client, rows):
+        authors = create_authors(rows)
+        title = Title.objects.create(name='Title', year=2000)
+        review = Review.objects.create(
+            title=title, author=authors[0], text='text', score=5
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text='text')
+            for author in authors
+        )
+        stamps.bump(stamps.comments_key(review.id))
+        queries, data = count_queries(
+            client, self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title.id, review_id=review.id
+            )
+        )
+        assert len(data['results']) == rows
+        assert queries <= 4, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'выполняет постоянное число запросов к БД, независимо от '
+            f'количества комментариев на странице. Выполнено: {queries}.'
+        )
+
+    def test_03_review_create(self, user_client, user):
+        title = Title.objects.create(name='Title', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 't', 'score': 5})
+        assert response.status_code == HTTPStatus.CREATED
+        title_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT "reviews_title"."id"')
+        ]
+        assert len(title_queries) == 1, (
+            f'Проверьте, что POST-запрос к `{self.REVIEWS_URL_TEMPLATE}` '
+            'загружает произведение один раз за запрос.'
+        )
+        response = user_client.post(url, data={'text': 't', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_comment_review_must_belong_to_title(self, client, user):
+        title, other_title = Title.objects.bulk_create(
+            Title(name=name, year=2000) for name in ('First', 'Second')
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+        response = client.get(self.COMMENTS_URL_TEMPLATE.format(
+            title_id=other_title.id, review_id=review.id
+        ))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{self.COMMENTS_URL_TEMPLATE}` '
+            'возвращает 404, если отзыв не относится к произведению.'
+        )
+
+    def test_05_reviews_cursor_pagination(self, client):
+        title = Title.objects.create(name='Title', year=2000)
+        Review.objects.bulk_create(
+            Review(title=title, author=author, text='text', score=5)
+            for author in create_authors(9)
+        )
+        title.reviews_count = 9
+        title.save()
+        expected = list(
+            title.reviews.order_by('-pub_date', 'id').values_list(
+                'id', flat=True
+            )
+        )
+        url = (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?pagination=cursor&limit=4&count=true'
+        )
+        received = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert data['count'] == 9
+            assert not any(
+                'COUNT(' in query['sql'] for query in context.captured_queries
+            ), (
+                'Проверьте, что курсорная пагинация отзывов не выполняет '
+                '`COUNT(*)`.'
+            )
+            received.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert received == expected, (
+            'Проверьте, что курсорная пагинация отзывов возвращает все '
+            'отзывы в порядке `(-pub_date, id)`.'
+        )
+
+    def test_06_title_create_resolves_genres_at_once(self, admin_client):
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre{idx}')
+            for idx in range(10)
+        )
+        data = {
+            'name': 'Title', 'year': 2000, 'category': 'films',
+            'genre': [f'genre{idx}' for idx in range(10)]
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        genre_lookups = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_genre"' in query['sql']
+            and '"slug" IN' in query['sql']
+        ]
+        assert len(genre_lookups) == 1, (
+            'Проверьте, что жанры произведения загружаются по slug одним '
+            'запросом.'
+        )
+
+        data['genre'] = ['genre1', 'unknown', 'missing']
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'unknown, missing' in response.json()['genre'][0], (
+            'Проверьте, что в ошибке перечисляются все несуществующие slug '
+            'жанров.'
+        )
+
+    @pytest.mark.parametrize('genres', (1, 10))
+    def test_07_title_write_response(self, admin_client, genres):
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre{idx}')
+            for idx in range(genres)
+        )
+        data = {
+            'name': 'Title', 'year': 2000, 'category': 'films',
+            'genre': [f'genre{idx}' for idx in range(genres - 1, -1, -1)]
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        created_queries = len(context.captured_queries)
+        title_id = response.json()['id']
+        url = f'/api/v1/titles/{title_id}/'
+        assert response.json() == admin_client.get(url).json(), (
+            'Проверьте, что ответ на POST-запрос к `/api/v1/titles/` '
+            'совпадает с ответом на GET-запрос к созданному произведению.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(url, data={'name': 'New'})
+        patched_queries = len(context.captured_queries)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['genre'] == admin_client.get(url).json()[
+            'genre'
+        ]
+        queries = created_queries, patched_queries
+        assert queries == (18, 14), (
+            'Проверьте, что POST- и PATCH-запросы к `/api/v1/titles/` '
+            'выполняют постоянное число запросов к БД и не загружают '
+            f'произведение повторно для ответа. Выполнено: {queries}.'
+        )
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from tests.conftest import MANAGE_PATH
+
+CSV_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('workers', (1, 2))
+def test_import_data(workers):
+    from reviews.models import Comment, Review, Title
+
+    call_command(
+        'import_data', path=CSV_PATH, batch_size=7, workers=workers,
+        stdout=StringIO()
+    )
+    assert Title.objects.count() == 32
+    assert Title.genre.through.objects.count() == 42, (
+        'Проверьте, что команда `import_data` загружает связи произведений '
+        'и жанров из `genre_title.csv`.'
+    )
+    assert Review.objects.count() == 72
+    assert Comment.objects.count() == 3
+    assert not Title.objects.filter(
+        reviews__isnull=False, rating__isnull=True
+    ).exists(), (
+        'Проверьте, что после загрузки данных рейтинг произведений '
+        'пересчитывается.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_data_spawn(monkeypatch):
+    from reviews.management.commands import import_data
+    from reviews.models import Review
+
+    monkeypatch.setattr(
+        import_data, 'multiprocessing', multiprocessing.get_context('spawn')
+    )
+    stderr = StringIO()
+    call_command(
+        'import_data', path=CSV_PATH, workers=2,
+        stdout=StringIO(), stderr=stderr
+    )
+    assert not stderr.getvalue()
+    assert Review.objects.count() == 72, (
+        'Проверьте, что `import_data --workers` работает, когда процессы '
+        'запускаются методом spawn (по умолчанию в Windows и macOS).'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('output_format,compress', (
+    ('csv', False), ('csv', True), ('jsonl', False)
+))
+def test_export_data(tmp_path, output_format, compress):
+    from reviews.models import Comment, Review, Title
+
+    call_command(
+        'import_data', path=CSV_PATH, stdout=StringIO()
+    )
+    call_command(
+        'export_data', output=str(tmp_path), format=output_format,
+        gzip=compress, chunk_size=5, stdout=StringIO()
+    )
+    suffix = '.csv' if output_format == 'csv' else '.jsonl'
+    if compress:
+        suffix += '.gz'
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.splitext(name)[0] + suffix
+        for name in os.listdir(CSV_PATH)
+    ), (
+        'Проверьте, что команда `export_data` выгружает те же файлы, что '
+        'загружает `import_data`.'
+    )
+    if output_format != 'csv' or compress:
+        return
+    with open(os.path.join(tmp_path, 'users.csv'), encoding='utf-8') as file:
+        exported = set(file.readline().strip().split(','))
+    with open(os.path.join(CSV_PATH, 'users.csv'), encoding='utf-8') as file:
+        assert exported == set(file.readline().strip().split(',')), (
+            'Проверьте, что `export_data` выгружает пользователей только '
+            'с полями `users.csv`, без паролей и прав доступа.'
+        )
+    Comment.objects.all().delete()
+    Review.objects.all().delete()
+    Title.objects.all().delete()
+    call_command('import_data', path=str(tmp_path), stdout=StringIO())
+    assert Title.genre.through.objects.count() == 42
+    assert Review.objects.count() == 72, (
+        'Проверьте, что файлы `export_data` можно загрузить обратно '
+        'командой `import_data`.'
+    )
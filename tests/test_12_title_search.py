@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_word_forms(self, client):
+        Title.objects.create(
+            name='Война и мир', year=1869,
+            description='Роман о войне 1812 года.'
+        )
+        Title.objects.create(
+            name='Мирные дни', year=1950, description='Повесть.'
+        )
+        Title.objects.create(
+            name='Тихий Дон', year=1940,
+            description='Казаки на войне и в мирной жизни.'
+        )
+        assert self.search(client, 'войны') == ['Война и мир', 'Тихий Дон'], (
+            'Проверьте, что поиск по `search` учитывает формы русских слов '
+            'и совпадения в названии ранжируются выше совпадений в описании.'
+        )
+        assert self.search(client, 'мир войне') == [
+            'Война и мир', 'Тихий Дон'
+        ]
+        assert self.search(client, 'рома') == ['Война и мир'], (
+            'Проверьте, что поиск находит произведения по началу слова.'
+        )
+        assert self.search(client, 'океан') == []
+
+    def test_02_index_follows_changes(self, client):
+        title = Title.objects.create(name='Собака Баскервилей', year=1902)
+        title.name = 'Этюд в багровых тонах'
+        title.save()
+        assert self.search(client, 'собака') == []
+        assert self.search(client, 'багровый') == [title.name]
+        title.delete()
+        assert self.search(client, 'багровый') == []
@@ -0,0 +1,128 @@
+import pytest
+from django.db import connection
+from django.db.models import Count, Sum
+
+from reviews.models import (
+    Category, Comment, Review, Title, TitleRanking, User
+)
+
+TITLES = 50
+AUTHORS = 40
+
+
+@pytest.fixture
+def catalogue():
+    category = Category.objects.create(name='Фильм', slug='films')
+    titles = Title.objects.bulk_create(
+        Title(name=f'Title {idx}', year=1950 + idx % 30, category=category)
+        for idx in range(TITLES)
+    )
+    authors = User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(AUTHORS)
+    )
+    reviews = Review.objects.bulk_create(
+        Review(title=title, author=author, text='text', score=idx % 10 + 1)
+        for idx, (title, author) in enumerate(
+            (title, author) for title in titles for author in authors
+        )
+    )
+    Comment.objects.bulk_create(
+        Comment(review=review, author=review.author, text='text')
+        for review in reviews[::4]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return category, titles[0], reviews[0]
+
+
+def check_plan(queryset, index_name, description):
+    plan = queryset.explain()
+    assert index_name in plan, (
+        f'Проверьте, что {description} использует индекс `{index_name}`. '
+        f'План запроса:\n{plan}'
+    )
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plan, (
+        f'Проверьте, что {description} не сортирует результат отдельно. '
+        f'План запроса:\n{plan}'
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Планы запросов SQLite'
+)
+@pytest.mark.django_db(transaction=True)
+class Test13QueryPlans:
+
+    def test_01_reviews_by_title(self, catalogue):
+        _, title, _ = catalogue
+        check_plan(
+            Review.objects.filter(title=title).order_by('-pub_date', 'id'),
+            'review_title_pub_date_idx', 'выборка отзывов произведения'
+        )
+
+    def test_02_comments_by_review(self, catalogue):
+        _, _, review = catalogue
+        check_plan(
+            Comment.objects.filter(review=review).order_by('-pub_date', 'id'),
+            'comment_review_pub_date_idx', 'выборка комментариев к отзыву'
+        )
+
+    def test_03_titles_by_year_and_category(self, catalogue):
+        category, _, _ = catalogue
+        check_plan(
+            Title.objects.filter(year=1960).order_by('name'),
+            'title_year_name_idx', 'фильтрация произведений по году'
+        )
+        check_plan(
+            Title.objects.filter(category=category).order_by('name'),
+            'title_category_name_idx',
+            'фильтрация произведений по категории'
+        )
+
+    def test_04_rating_aggregate(self, catalogue):
+        _, title, _ = catalogue
+        queryset = Review.objects.filter(title=title).values(
+            'title'
+        ).annotate(count=Count('pk'), total=Sum('score'))
+        plan = queryset.explain()
+        assert 'COVERING INDEX review_title_score_idx' in plan, (
+            'Проверьте, что пересчёт рейтинга читает оценки из покрывающего '
+            f'индекса `review_title_score_idx`. План запроса:\n{plan}'
+        )
+
+    def test_05_leaderboard_page(self, catalogue):
+        from reviews.rankings import rebuild_rankings
+        from reviews.ratings import rebuild_ratings
+
+        rebuild_ratings()
+        rebuild_rankings()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        ranking = TitleRanking.objects.filter(
+            window='all', scope='all'
+        ).order_by('-score', 'title_id')[5]
+        check_plan(
+            TitleRanking.objects.filter(
+                window='all', scope='all', score__lte=ranking.score
+            ).exclude(
+                score=ranking.score, title_id__lte=ranking.title_id
+            ).order_by('-score', 'title_id')[:10],
+            'title_ranking_order_idx', 'страница лидерборда по курсору'
+        )
+
+    @pytest.mark.parametrize('field, index_name', (
+        ('name', 'title_name_idx'),
+        ('year', 'title_year_idx'),
+        ('rating', 'title_rating_idx'),
+        ('reviews_count', 'title_reviews_count_idx'),
+    ))
+    @pytest.mark.parametrize('direction', ('', '-'))
+    def test_06_title_ordering(self, catalogue, field, index_name,
+                               direction):
+        check_plan(
+            Title.objects.order_by(
+                f'{direction}{field}', f'{direction}id'
+            )[:10],
+            index_name, f'сортировка произведений по `{direction}{field}`'
+        )
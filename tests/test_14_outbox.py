@@ -0,0 +1,105 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+class BrokenBackend:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class UnreachableBackend(BrokenBackend):
+
+    def __enter__(self):
+        raise ConnectionRefusedError('SMTP-сервер не отвечает')
+
+
+class CheckingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        assert not connection.in_atomic_block, (
+            'Проверьте, что письма отправляются вне транзакции.'
+        )
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Outbox:
+
+    SIGNUP_URL = '/api/v1/auth/signup/'
+    DATA = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+
+    def test_01_signup_enqueues_email(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        response = client.post(self.SIGNUP_URL, data=self.DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что `signup` не отправляет письмо в запросе, а '
+            'ставит его в очередь.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipients == [self.DATA['email']]
+
+        call_command('send_emails', once=True, stdout=StringIO())
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из '
+            'очереди.'
+        )
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+    def test_02_failed_email_retried_with_backoff(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        client.post(self.SIGNUP_URL, data=self.DATA)
+        settings.EMAIL_BACKEND = f'{__name__}.BrokenBackend'
+        call_command('send_emails', once=True, stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert email.send_after > timezone.now(), (
+            'Проверьте, что неудачная отправка повторяется с задержкой.'
+        )
+
+        settings.EMAIL_BACKEND = f'{EmailBackend.__module__}.EmailBackend'
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('send_emails', once=True, stdout=StringIO())
+        assert len(mail.outbox) == 1
+
+    def test_03_unreachable_server(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        client.post(self.SIGNUP_URL, data=self.DATA)
+        settings.EMAIL_BACKEND = f'{__name__}.UnreachableBackend'
+        call_command('send_emails', once=True, stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1 and email.sent_at is None
+        assert 'не отвечает' in email.last_error
+        assert email.send_after > timezone.now(), (
+            'Проверьте, что ошибка соединения с SMTP-сервером учитывается '
+            'как неудачная попытка с задержкой перед повтором.'
+        )
+
+    def test_04_sent_outside_transaction(self, client, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+        client.post(self.SIGNUP_URL, data=self.DATA)
+        settings.EMAIL_BACKEND = f'{__name__}.CheckingBackend'
+        call_command('send_emails', once=True, stdout=StringIO())
+        assert len(mail.outbox) == 1
+        assert OutgoingEmail.objects.get().sent_at is not None
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import RoleAccessToken
+
+
+def users_table_queries(context):
+    return [
+        query for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15CachedJWTAuthentication:
+
+    USERS_URL = '/api/v1/users/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_role_in_token(self, admin):
+        token = AccessToken(str(RoleAccessToken.for_user(admin)))
+        assert (token['role'], token['is_staff']) == ('admin', False), (
+            'Проверьте, что в access-токен записываются `role` и '
+            '`is_staff` пользователя.'
+        )
+
+    def test_02_read_requests_skip_users_table(self, admin):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(admin)}'
+        )
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(self.USERS_URL)
+            assert response.status_code == HTTPStatus.OK
+            user_queries = [
+                query for query in users_table_queries(context)
+                if '"reviews_user"."id" =' in query['sql']
+            ]
+            assert not user_queries, (
+                'Проверьте, что читающие запросы с токеном не загружают '
+                'пользователя из БД.'
+            )
+
+    def test_03_role_change_applied(self, admin_client, user, user_client):
+        with CaptureQueriesContext(connection) as context:
+            for _ in range(2):
+                response = user_client.get(self.CATEGORIES_URL)
+                assert response.status_code == HTTPStatus.OK
+        assert len(users_table_queries(context)) == 1, (
+            'Проверьте, что пользователь кэшируется между запросами.'
+        )
+        assert user_client.get(self.USERS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.USERS_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что смена роли пользователя через `/api/v1/users/` '
+            'сбрасывает кэш аутентификации.'
+        )
@@ -0,0 +1,67 @@
+import os
+import time
+
+import pytest
+
+from api.serializers import TitleReadSerializer
+from reviews.models import Category, Genre, Title
+
+TITLES = 10000
+# Сравнение скорости зависит от нагрузки машины, поэтому выполняется
+# только по запросу: SERIALIZER_BENCHMARK=1.
+BENCHMARK = bool(os.environ.get('SERIALIZER_BENCHMARK'))
+
+
+@pytest.fixture
+def titles():
+    categories = Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'category{idx}')
+        for idx in range(5)
+    )
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre{idx}') for idx in range(12)
+    )
+    titles = Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx}',
+            year=1900 + idx % 120,
+            category=None if idx % 7 == 0 else categories[idx % 5],
+            description=f'Описание {idx}' if idx % 3 else None,
+            rating=idx % 10 + 1 if idx % 4 else None
+        )
+        for idx in range(TITLES)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genres[(idx + shift) % 12])
+        for idx, title in enumerate(titles)
+        for shift in range(idx % 4)
+    )
+    return Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('name')
+
+
+def measure(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fast_title_serialization(titles):
+    expected, slow = measure(
+        lambda: TitleReadSerializer(titles.all(), many=True).data
+    )
+    actual, fast = measure(
+        lambda: TitleReadSerializer.fast_data(
+            list(TitleReadSerializer.fast_queryset(titles.all()))
+        )
+    )
+    assert actual == [dict(item) for item in expected], (
+        'Проверьте, что быстрый путь TitleReadSerializer возвращает те же '
+        'данные, что и обычная сериализация.'
+    )
+    assert not BENCHMARK or fast < slow, (
+        'Проверьте, что быстрый путь TitleReadSerializer быстрее обычной '
+        'сериализации.'
+    )
@@ -0,0 +1,115 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return [query['sql'] for query in context.captured_queries], response
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture
+    def title(self):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(
+            name='Title', year=2000, category=category,
+            description='Очень длинное описание'
+        )
+        title.genre.set([genre])
+        return title
+
+    def test_01_titles_list_fields(self, client, title):
+        queries, response = get_with_queries(
+            client, f'{self.TITLES_URL}?fields=id,name,rating'
+        )
+        assert response.json()['results'] == [
+            {'id': title.id, 'name': 'Title', 'rating': None}
+        ], (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` с параметром '
+            '`fields` возвращает только перечисленные поля.'
+        )
+        sql = ' '.join(queries)
+        assert 'description' not in sql and 'reviews_genre' not in sql, (
+            'Проверьте, что незапрошенные поля и жанры не загружаются из БД.'
+        )
+
+    def test_02_titles_list_with_genre(self, client, title):
+        queries, response = get_with_queries(
+            client, f'{self.TITLES_URL}?fields=genre,category'
+        )
+        assert response.json()['results'] == [{
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+            'genre': [{'name': 'Драма', 'slug': 'drama'}],
+        }]
+
+    def test_03_title_detail_fields(self, client, title):
+        queries, response = get_with_queries(
+            client,
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id)
+            + '?fields=name,year'
+        )
+        assert response.json() == {'name': 'Title', 'year': 2000}
+        queries = [sql for sql in queries if 'FROM "reviews_title"' in sql]
+        assert len(queries) == 1, (
+            'Проверьте, что произведение без жанров и категории '
+            'загружается одним запросом к БД.'
+        )
+        assert 'description' not in queries[0]
+        assert 'reviews_category' not in queries[0]
+
+    def test_04_unknown_field(self, client, title):
+        response = client.get(f'{self.TITLES_URL}?fields=name,secret')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное поле в параметре `fields` '
+            'возвращает статус 400.'
+        )
+        assert 'fields' in response.json()
+
+    def test_05_reviews_and_comments(self, client, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Длинный текст', score=7
+        )
+        Comment.objects.create(review=review, author=user, text='Текст')
+        queries, response = get_with_queries(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?fields=id,score'
+        )
+        assert response.json()['results'] == [{'id': review.id, 'score': 7}]
+        assert '"text"' not in queries[-1]
+        assert 'reviews_user' not in queries[-1]
+
+        queries, response = get_with_queries(
+            client,
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title.id, review_id=review.id
+            ) + '?fields=author'
+        )
+        assert response.json()['results'] == [{'author': user.username}]
+        assert '"text"' not in queries[-1]
+
+    def test_06_write_ignores_fields(self, admin_client, title):
+        response = admin_client.patch(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title.id)
+            + '?fields=name',
+            data={'year': 2001}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['year'] == 2001
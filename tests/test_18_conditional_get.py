@@ -0,0 +1,161 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from reviews.models import Comment, Review, Title, VersionStamp
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    @pytest.fixture
+    def review(self, user):
+        title = Title.objects.create(name='Title', year=2000)
+        return Review.objects.create(
+            title=title, author=user, text='text', score=5
+        )
+
+    def test_01_titles_not_modified(self, client, review, admin):
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        assert etag.startswith('"'), (
+            f'Проверьте, что GET-запрос к `{self.TITLES_URL}` возвращает '
+            'сильный ETag.'
+        )
+        assert 'Last-Modified' in response
+        assert 'public' in response['Cache-Control']
+        assert 'Authorization' in response['Vary']
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        queries = len(context.captured_queries)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что при совпадении `If-None-Match` возвращается 304.'
+        )
+        assert queries == 0
+        assert response['ETag'] == etag
+        assert not response.content
+        assert not VersionStamp.objects.filter(
+            key__startswith='comments:'
+        ).exists()
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id
+        )
+        assert client.get(comments_url)['ETag'] == client.get(
+            comments_url
+        )['ETag']
+        assert not VersionStamp.objects.filter(
+            key__startswith='comments:'
+        ).exists(), (
+            'Проверьте, что GET-запрос не создаёт строку версии коллекции.'
+        )
+
+        Review.objects.create(
+            title=review.title, author=admin, text='new', score=1
+        )
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после нового отзыва ETag списка произведений '
+            'меняется: рейтинг мог измениться.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_etag_depends_on_query(self, client, review):
+        etag = client.get(self.TITLES_URL)['ETag']
+        response = client.get(
+            f'{self.TITLES_URL}?fields=name', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_reviews_not_modified_without_list_query(self, client, review):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id)
+        etag = client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert not any(
+            'reviews_review' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что ответ 304 не выполняет запрос списка отзывов.'
+        )
+
+        review.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва меняет ETag списка отзывов.'
+        )
+        assert response.json()['results'] == []
+
+    def test_04_if_modified_since(self, client, review):
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id)
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_comments_follow_author_changes(self, client, review, user):
+        Comment.objects.create(review=review, author=user, text='text')
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=review.title_id, review_id=review.id
+        )
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+        user.username = 'renamed'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет ETag комментариев.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_06_authenticated_responses_are_private(self, user_client,
+                                                    review):
+        response = user_client.get(self.TITLES_URL)
+        assert 'private' in response['Cache-Control']
+        assert 'public' not in response['Cache-Control']
+        assert 'Authorization' in response['Vary']
+
+    def test_07_rename_bumps_only_author_collections(self, client, review,
+                                                     user, admin):
+        other = Review.objects.create(
+            title=Title.objects.create(name='Other', year=2000),
+            author=admin, text='text', score=5
+        )
+        urls = [
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+            for title_id in (review.title_id, other.title_id)
+        ]
+        etags = [client.get(url)['ETag'] for url in urls]
+        user.first_name = 'Имя'
+        user.save()
+        assert client.get(
+            urls[0], HTTP_IF_NONE_MATCH=etags[0]
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что изменение пользователя без смены имени '
+            'не меняет ETag его отзывов.'
+        )
+        user.username = 'renamed'
+        user.save()
+        assert client.get(
+            urls[0], HTTP_IF_NONE_MATCH=etags[0]
+        ).status_code == HTTPStatus.OK
+        assert client.get(
+            urls[1], HTTP_IF_NONE_MATCH=etags[1]
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что смена имени меняет ETag только коллекций '
+            'с отзывами и комментариями пользователя.'
+        )
@@ -0,0 +1,126 @@
+import datetime
+import io
+import json
+import os
+import time
+import uuid
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import parsers, renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from reviews.models import Review, Title
+
+ROWS = 20000
+# Сравнение скорости зависит от нагрузки машины, поэтому выполняется
+# только по запросу: RENDERER_BENCHMARK=1.
+BENCHMARK = bool(os.environ.get('RENDERER_BENCHMARK'))
+
+
+def io_stream(body):
+    return io.BytesIO(body)
+
+
+def payloads():
+    return [
+        {'count': 0, 'next': None, 'previous': None, 'results': []},
+        {
+            'id': 1,
+            'name': 'Произведение «Война и мир»  ',
+            'pub_date': datetime.datetime(
+                2024, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc
+            ),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(3, 4, 5, 678901),
+            'amount': Decimal('1.5'),
+            'uuid': uuid.UUID(int=1),
+            'lazy': gettext_lazy('Не задано'),
+            'bytes': b'data',
+            'nested': [(1, 2), {'genre': None, 'rating': 10}],
+        },
+        {'big': 2 ** 70, 1: 'не строковый ключ'},
+    ]
+
+
+@pytest.mark.parametrize('data', payloads())
+def test_01_same_output(data):
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data), (
+        'Проверьте, что FastJSONRenderer выводит те же байты, что и '
+        'JSONRenderer.'
+    )
+
+
+def test_02_indent_and_fallback(monkeypatch):
+    data = payloads()[1]
+    media_type = 'application/json; indent=4'
+    assert FastJSONRenderer().render(
+        data, media_type
+    ) == JSONRenderer().render(data, media_type)
+    monkeypatch.setattr(renderers, 'orjson', None)
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data), (
+        'Проверьте, что без orjson используется стандартный рендерер.'
+    )
+
+
+def test_03_parser(monkeypatch):
+    body = '{"text": "Отзыв", "score": 10, "genre": ["drama"]}'.encode()
+    expected = JSONParser().parse(io_stream(body))
+    assert FastJSONParser().parse(io_stream(body)) == expected
+    with pytest.raises(ParseError):
+        FastJSONParser().parse(io_stream(b'{"score": NaN}'))
+    monkeypatch.setattr(parsers, 'orjson', None)
+    assert FastJSONParser().parse(io_stream(body)) == expected
+
+
+@pytest.mark.django_db(transaction=True)
+def test_04_api_response(client, admin_client, user):
+    title = Title.objects.create(name='Title', year=2000)
+    Review.objects.create(title=title, author=user, text='Текст', score=7)
+    response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+    assert response.status_code == HTTPStatus.OK
+    assert response['Content-Type'] == 'application/json'
+    assert response.content == JSONRenderer().render(response.data)
+    response = admin_client.post(
+        '/api/v1/titles/', data='{"name": ', content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['detail'].startswith('JSON parse error')
+
+
+def test_05_render_throughput():
+    pytest.importorskip('orjson')
+    review = {
+        'text': 'Текст отзыва ' * 20,
+        'score': 10,
+        'pub_date': datetime.datetime(
+            2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc
+        ),
+    }
+    data = {
+        'count': ROWS, 'next': None, 'previous': None,
+        'results': [
+            {'id': idx, 'author': f'user{idx}', **review}
+            for idx in range(ROWS)
+        ],
+    }
+    timings = {}
+    contents = {}
+    for renderer in (JSONRenderer(), FastJSONRenderer()):
+        name = type(renderer).__name__
+        started = time.perf_counter()
+        contents[name] = renderer.render(data)
+        timings[name] = time.perf_counter() - started
+    assert json.loads(contents['FastJSONRenderer']) == json.loads(
+        contents['JSONRenderer']
+    ), 'Проверьте, что FastJSONRenderer выводит те же данные.'
+    slow, fast = timings['JSONRenderer'], timings['FastJSONRenderer']
+    assert not BENCHMARK or fast < slow, (
+        'Проверьте, что FastJSONRenderer быстрее JSONRenderer.'
+    )
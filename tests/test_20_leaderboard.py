@@ -0,0 +1,184 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reviews import bitmaps, rankings
+from reviews.models import Category, Genre, Review, Title, TitleRanking
+from tests.utils import create_authors
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20Leaderboard:
+
+    URL = '/api/v1/leaderboard/'
+
+    @pytest.fixture
+    def titles(self):
+        authors = create_authors(3)
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        book = Category.objects.create(name='Книга', slug='book')
+        titles = {}
+        for name, category, genres, scores in (
+            ('Лучший', movie, [drama], [10, 10]),
+            ('Хороший', book, [drama, comedy], [8, 8, 8]),
+            ('Средний', movie, [comedy], [5]),
+            ('Без отзывов', book, [drama], []),
+        ):
+            title = Title.objects.create(
+                name=name, year=2000, category=category
+            )
+            title.genre.set(genres)
+            for author, score in zip(authors, scores):
+                Review.objects.create(
+                    title=title, author=author, text='text', score=score
+                )
+            titles[name] = title
+        return titles
+
+    def names(self, client, query=''):
+        response = client.get(f'{self.URL}{query}')
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_top_by_scope(self, client, titles):
+        assert self.names(client) == ['Лучший', 'Хороший', 'Средний'], (
+            f'Проверьте, что `{self.URL}` упорядочивает произведения по '
+            'рейтингу и не включает произведения без оценок.'
+        )
+        assert self.names(client, '?genre=drama') == ['Лучший', 'Хороший']
+        assert self.names(client, '?category=book') == ['Хороший']
+        assert self.names(client, '?genre=unknown') == []
+
+    def test_02_updated_when_reviews_change(self, client, titles):
+        Review.objects.filter(title=titles['Лучший']).delete()
+        assert self.names(client) == ['Хороший', 'Средний']
+        titles['Средний'].genre.add(Genre.objects.get(slug='drama'))
+        assert self.names(client, '?genre=drama') == ['Хороший', 'Средний']
+        titles['Хороший'].delete()
+        assert self.names(client, '?category=book') == []
+
+    def test_03_trending(self, client, titles):
+        assert self.names(client, '?window=week') == [
+            'Хороший', 'Лучший', 'Средний'
+        ], (
+            'Проверьте, что недельный рейтинг упорядочен по числу отзывов.'
+        )
+        Review.objects.filter(title=titles['Хороший']).update(
+            pub_date=timezone.now() - timedelta(days=8)
+        )
+        call_command('refresh_rankings')
+        assert self.names(client, '?window=week') == ['Лучший', 'Средний']
+        assert self.names(client) == ['Лучший', 'Хороший', 'Средний']
+
+    def test_04_pagination(self, client, titles):
+        authors = create_authors(1, prefix='reader')
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx:02}', year=2000)
+            for idx in range(25)
+        )
+        for title in Title.objects.filter(name__startswith='Произведение'):
+            Review.objects.create(
+                title=title, author=authors[0], text='text', score=7
+            )
+        expected = self.names(client, '?limit=100')
+        url = f'{self.URL}?limit=4'
+        received = []
+        queries = set()
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            queries.add(len(context.captured_queries))
+            data = response.json()
+            received.extend(title['name'] for title in data['results'])
+            url = data['next']
+        assert received == expected and len(received) == 28, (
+            'Проверьте, что курсорная пагинация лидерборда возвращает все '
+            'произведения по одному разу.'
+        )
+        assert len(queries) == 1 and max(queries) <= 4, (
+            'Проверьте, что страница лидерборда выполняет постоянное число '
+            f'запросов к БД. Выполнено: {sorted(queries)}.'
+        )
+
+    def test_05_invalid_params(self, client, titles):
+        assert client.get(
+            f'{self.URL}?window=year'
+        ).status_code == HTTPStatus.BAD_REQUEST
+        assert client.get(
+            f'{self.URL}?genre=drama&category=movie'
+        ).status_code == HTTPStatus.BAD_REQUEST
+        assert client.get(
+            f'{self.URL}?cursor=broken'
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_06_rebuild_matches_incremental(self, titles):
+        incremental = set(TitleRanking.objects.values_list(
+            'window', 'scope', 'title_id', 'score', 'reviews_count'
+        ))
+        call_command('refresh_rankings')
+        assert set(TitleRanking.objects.values_list(
+            'window', 'scope', 'title_id', 'score', 'reviews_count'
+        )) == incremental
+
+    def test_07_refreshed_once_per_transaction(self, monkeypatch, titles):
+        calls = {'rankings': [], 'bitmaps': []}
+        monkeypatch.setattr(
+            rankings, 'refresh_titles', calls['rankings'].append
+        )
+        monkeypatch.setattr(bitmaps, 'refresh_titles', calls['bitmaps'].append)
+        changed = list(titles.values())[:2]
+        genre = Genre.objects.get(slug='comedy')
+        with transaction.atomic():
+            for title in changed:
+                title.name = 'New'
+                title.save()
+                title.genre.set([genre])
+            assert calls == {'rankings': [], 'bitmaps': []}
+        expected = [{title.pk for title in changed}]
+        assert calls == {'rankings': expected, 'bitmaps': expected}, (
+            'Проверьте, что пересчёт рейтингов и битового индекса '
+            'выполняется после коммита один раз для всех произведений '
+            'транзакции.'
+        )
+
+    def test_08_refreshed_after_rollback(self, monkeypatch, titles):
+        calls = []
+        monkeypatch.setattr(rankings, 'refresh_titles', calls.append)
+        first, second = list(titles.values())[:2]
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                first.save()
+                raise RuntimeError
+        assert not calls
+        with transaction.atomic():
+            second.save()
+        assert len(calls) == 1 and second.pk in calls[0], (
+            'Проверьте, что откат транзакции не мешает пересчёту '
+            'рейтингов в следующих транзакциях.'
+        )
+
+    def test_09_refresh_is_atomic(self, monkeypatch, titles):
+        title = titles['Лучший']
+        before = set(TitleRanking.objects.filter(
+            title=title
+        ).values_list('window', 'scope', 'score'))
+
+        def fail(*args, **kwargs):
+            raise RuntimeError
+
+        monkeypatch.setattr(TitleRanking.objects, 'bulk_create', fail)
+        with pytest.raises(RuntimeError):
+            rankings.refresh_titles({title.pk})
+        assert set(TitleRanking.objects.filter(
+            title=title
+        ).values_list('window', 'scope', 'score')) == before, (
+            'Проверьте, что строки рейтинга удаляются и записываются '
+            'в одной транзакции.'
+        )
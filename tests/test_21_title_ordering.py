@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Title
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def titles():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    return Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx % 5}',
+            year=2000 + idx % 3,
+            category=films if idx % 2 else books,
+            rating=None if idx % 4 == 0 else idx % 3 + 1,
+            reviews_count=idx % 4
+        )
+        for idx in range(12)
+    )
+
+
+def fetch_all(client, query, limit=5):
+    received = []
+    offset = 0
+    while True:
+        response = client.get(
+            f'{URL}?{query}&limit={limit}&offset={offset}'
+        )
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        received.extend(title['id'] for title in results)
+        if len(results) < limit:
+            return received
+        offset += limit
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TitleOrdering:
+
+    @pytest.mark.parametrize('field', ('name', 'year', 'rating',
+                                       'reviews_count'))
+    @pytest.mark.parametrize('direction', ('', '-'))
+    def test_01_ordering(self, client, titles, field, direction):
+        expected = list(Title.objects.order_by(
+            f'{direction}{field}', f'{direction}id'
+        ).values_list('id', flat=True))
+        assert fetch_all(client, f'ordering={direction}{field}') == (
+            expected
+        ), (
+            f'Проверьте, что `{URL}?ordering={direction}{field}` '
+            'сортирует произведения с id в качестве второго ключа и '
+            'страницы limit/offset не пересекаются.'
+        )
+
+    def test_02_ordering_with_filter(self, client, titles):
+        expected = list(Title.objects.filter(
+            category__slug='films', year=2001
+        ).order_by('-rating', '-id').values_list('id', flat=True))
+        assert fetch_all(
+            client, 'category=films&year=2001&ordering=-rating', limit=2
+        ) == expected
+
+    def test_03_default_and_unknown_ordering(self, client, titles):
+        expected = fetch_all(client, 'year=2000')
+        assert fetch_all(client, 'year=2000&ordering=description') == (
+            expected
+        ), (
+            'Проверьте, что сортировка по недопустимому полю игнорируется.'
+        )
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, ScoreCount, Title
+from tests.utils import create_authors
+
+
+def counters():
+    return set(ScoreCount.objects.filter(count__gt=0).values_list(
+        'title_id', 'score', 'count'
+    ))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleStatistics:
+
+    URL = '/api/v1/titles/{title_id}/statistics/'
+
+    @pytest.fixture
+    def title(self):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for author, score in zip(create_authors(4), (10, 7, 7, 2)):
+            Review.objects.create(
+                title=title, author=author, text='text', score=score
+            )
+        return title
+
+    def statistics(self, client, title_id):
+        response = client.get(self.URL.format(title_id=title_id))
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.URL}` доступен без авторизации.'
+        )
+        return response.json()
+
+    def test_01_statistics(self, client, title):
+        data = self.statistics(client, title.pk)
+        assert data['count'] == 4
+        assert data['mean'] == 6.5
+        assert data['median'] == 7
+        assert [bucket['score'] for bucket in data['histogram']] == list(
+            range(1, 11)
+        )
+        assert {
+            bucket['score']: bucket['count'] for bucket in data['histogram']
+            if bucket['count']
+        } == {2: 1, 7: 2, 10: 1}
+
+    def test_02_empty_and_missing_title(self, client, title):
+        empty = Title.objects.create(name='Без отзывов', year=2000)
+        data = self.statistics(client, empty.pk)
+        assert data['count'] == 0
+        assert data['mean'] is None and data['median'] is None
+        assert sum(bucket['count'] for bucket in data['histogram']) == 0
+        assert client.get(
+            self.URL.format(title_id=empty.pk + 1)
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_updated_with_reviews(self, client, title):
+        review = Review.objects.get(title=title, score=2)
+        review.score = 9
+        review.save()
+        data = self.statistics(client, title.pk)
+        assert data['mean'] == 8.25 and data['median'] == 8
+        other = Title.objects.create(name='Другое', year=2000)
+        review.title = other
+        review.save()
+        assert self.statistics(client, title.pk)['median'] == 7
+        assert self.statistics(client, other.pk)['count'] == 1
+        Review.objects.filter(title=title, score=7).delete()
+        data = self.statistics(client, title.pk)
+        assert data['count'] == 1 and data['median'] == 10
+
+    def test_04_rebuild_matches_incremental(self, title):
+        other = Title.objects.create(name='Другое', year=2000)
+        authors = create_authors(3, prefix='reader')
+        for author, score in zip(authors, (1, 1, 5)):
+            Review.objects.create(
+                title=other, author=author, text='text', score=score
+            )
+        Review.objects.filter(score=1).first().delete()
+        incremental = counters()
+        call_command('rebuild_score_counts', batch_size=2)
+        assert counters() == incremental, (
+            'Проверьте, что команда `rebuild_score_counts` строит те же '
+            'счётчики, что и обновление при записи отзывов.'
+        )
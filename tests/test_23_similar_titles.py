@@ -0,0 +1,169 @@
+import os
+from http import HTTPStatus
+from io import StringIO
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+
+from reviews import similarity
+from reviews.models import Review, SimilarTitle, Title, User
+from reviews.similarity import ScoreMatrix
+from tests.test_11_import_data import CSV_PATH
+
+# Полный масштаб бенчмарка — 100 000 произведений и 1 000 000 отзывов;
+# по умолчанию он уменьшен, чтобы не замедлять тесты.
+BENCHMARK_SCALE = float(os.environ.get('SIMILAR_BENCHMARK_SCALE', 0.05))
+
+
+def random_reviews(titles, reviews, authors, seed=0):
+    generator = np.random.default_rng(seed)
+    pairs = np.unique(
+        generator.integers(0, authors, reviews) * titles
+        + generator.integers(1, titles + 1, reviews)
+    )
+    return (
+        pairs // titles,
+        pairs % titles + (pairs % titles == 0) * titles,
+        generator.integers(1, 11, len(pairs)),
+    )
+
+
+def as_rows(chunks):
+    return {
+        (title, other): score
+        for titles, similar, scores in chunks
+        for title, other, score in zip(
+            titles.tolist(), similar.tolist(), scores.tolist()
+        )
+    }
+
+
+def test_01_matches_dense_cosine(monkeypatch):
+    monkeypatch.setattr(similarity, 'PAIRS_CHUNK_SIZE', 50)
+    authors, titles, scores = random_reviews(30, 400, 40)
+    matrix = np.zeros((40, 31))
+    matrix[authors, titles] = scores
+    norms = np.linalg.norm(matrix, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dense = matrix.T @ matrix / np.outer(norms, norms)
+    expected = {}
+    for title in range(1, 31):
+        candidates = sorted(
+            (-dense[title, other], other) for other in range(1, 31)
+            if other != title and dense[title, other] > 0
+        )
+        for score, other in candidates[:5]:
+            expected[title, other] = -score
+    actual = as_rows(
+        ScoreMatrix(authors, titles, scores).top_similar(np.arange(31), 5)
+    )
+    assert actual.keys() == expected.keys()
+    assert np.allclose(
+        [actual[key] for key in expected], list(expected.values())
+    )
+
+
+def test_02_benchmark():
+    titles = int(100000 * BENCHMARK_SCALE)
+    authors, title_ids, scores = random_reviews(
+        titles, int(1000000 * BENCHMARK_SCALE), int(50000 * BENCHMARK_SCALE)
+    )
+    matrix = ScoreMatrix(authors, title_ids, scores)
+    rows = sum(
+        len(chunk[0]) for chunk in matrix.top_similar(
+            np.arange(1, titles + 1), 10
+        )
+    )
+    assert 0 < rows <= titles * 10
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23SimilarTitlesEndpoint:
+
+    URL = '/api/v1/titles/{title_id}/similar/'
+
+    @pytest.fixture
+    def titles(self):
+        authors = User.objects.bulk_create(
+            User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+            for idx in range(3)
+        )
+        titles = Title.objects.bulk_create(
+            Title(name=name, year=2000)
+            for name in ('Первое', 'Второе', 'Третье', 'Четвёртое')
+        )
+        for author, scores in zip(authors, (
+            (10, 10, 1, None),
+            (8, 8, None, 2),
+            (2, None, 9, None),
+        )):
+            for title, score in zip(titles, scores):
+                if score is not None:
+                    Review.objects.create(
+                        title=title, author=author, text='text', score=score
+                    )
+        call_command('refresh_similar_titles')
+        return titles
+
+    def similar(self, client, title):
+        response = client.get(self.URL.format(title_id=title.pk))
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.URL}` доступен без авторизации.'
+        )
+        return [
+            (data['name'], data['similarity']) for data in response.json()
+        ]
+
+    def test_01_similar(self, client, titles):
+        similar = self.similar(client, titles[0])
+        assert [name for name, _ in similar] == [
+            'Второе', 'Четвёртое', 'Третье'
+        ], (
+            f'Проверьте, что `{self.URL}` упорядочивает похожие '
+            'произведения по убыванию близости.'
+        )
+        assert similar[1][1] == pytest.approx(8 * 2 / (168 ** 0.5 * 2), 1e-3)
+        assert self.similar(client, titles[3])[0][0] == 'Второе'
+        assert client.get(
+            self.URL.format(title_id=titles[-1].pk + 1)
+        ).status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_incremental_refresh(self, client, titles):
+        reader = User.objects.create(
+            username='reader', email='reader@yamdb.fake'
+        )
+        Review.objects.create(
+            title=titles[2], author=reader, text='text', score=10
+        )
+        Review.objects.create(
+            title=titles[3], author=reader, text='text', score=10
+        )
+        call_command('refresh_similar_titles')
+        incremental = set(SimilarTitle.objects.values_list(
+            'title_id', 'similar_id', 'score'
+        ))
+        assert self.similar(client, titles[3])[0][0] == 'Третье'
+        call_command('refresh_similar_titles', full=True)
+        assert set(SimilarTitle.objects.values_list(
+            'title_id', 'similar_id', 'score'
+        )) == incremental, (
+            'Проверьте, что пересчёт изменившихся произведений даёт тот же '
+            'результат, что и полный пересчёт.'
+        )
+
+    def test_03_refresh_after_import(self):
+        call_command('refresh_similar_titles')
+        call_command('import_data', path=CSV_PATH, stdout=StringIO())
+        call_command('refresh_similar_titles')
+        incremental = set(SimilarTitle.objects.values_list(
+            'title_id', 'similar_id', 'score'
+        ))
+        assert incremental, (
+            'Проверьте, что инкрементальный пересчёт после `import_data` '
+            'учитывает загруженные отзывы.'
+        )
+        call_command('refresh_similar_titles', full=True)
+        assert set(SimilarTitle.objects.values_list(
+            'title_id', 'similar_id', 'score'
+        )) == incremental
@@ -0,0 +1,145 @@
+import os
+from http import HTTPStatus
+
+import numpy as np
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_response_cache
+from reviews.models import Review, SimilarTitle, Title, User
+
+URL = '/api/v1/users/me/recommendations/'
+# Полный масштаб — каталог из 100 000 произведений; по умолчанию он
+# уменьшен, чтобы не замедлять тесты.
+BENCHMARK_SCALE = float(
+    os.environ.get('RECOMMENDATIONS_BENCHMARK_SCALE', 0.05)
+)
+
+
+@pytest.fixture
+def titles(user):
+    authors = User.objects.bulk_create(
+        User(username=f'author{idx}', email=f'author{idx}@yamdb.fake')
+        for idx in range(3)
+    )
+    titles = {
+        title.name: title for title in Title.objects.bulk_create(
+            Title(name=name, year=2000) for name in 'ABCDE'
+        )
+    }
+    for author, scores in (
+        (authors[0], {'A': 10, 'B': 10, 'C': 2}),
+        (authors[1], {'A': 8, 'B': 9, 'D': 3}),
+        (authors[2], {'C': 9, 'E': 9}),
+        (user, {'A': 10, 'E': 2}),
+    ):
+        for name, score in scores.items():
+            Review.objects.create(
+                title=titles[name], author=author, text='text', score=score
+            )
+    call_command('refresh_similar_titles', full=True)
+    return titles
+
+
+def recommendations(client):
+    response = client.get(URL)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что `{URL}` доступен авторизованному пользователю.'
+    )
+    return [
+        (title['name'], title['predicted_score'])
+        for title in response.json()
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Recommendations:
+
+    def test_01_recommendations(self, client, user_client, titles):
+        assert client.get(URL).status_code == HTTPStatus.UNAUTHORIZED
+        received = recommendations(user_client)
+        assert [name for name, _ in received] == ['B', 'D', 'C'], (
+            f'Проверьте, что `{URL}` возвращает только неоценённые '
+            'пользователем произведения в порядке убывания прогноза.'
+        )
+        assert 6 < received[0][1] < 10 and received[2][1] < 6, (
+            'Проверьте, что прогноз лежит между средней оценкой '
+            'пользователя и оценками похожих произведений.'
+        )
+
+    def test_02_cache_invalidated_by_own_review(self, user_client, titles):
+        expected = recommendations(user_client)
+        SimilarTitle.objects.all().delete()
+        other = User.objects.get(username='author0')
+        Review.objects.create(
+            title=titles['D'], author=other, text='text', score=5
+        )
+        assert recommendations(user_client) == expected, (
+            'Проверьте, что рекомендации кэшируются и не сбрасываются '
+            'отзывами других пользователей.'
+        )
+        response = user_client.post(
+            f'/api/v1/titles/{titles["B"].pk}/reviews/',
+            data={'text': 'text', 'score': 7}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert recommendations(user_client) == [], (
+            'Проверьте, что новый отзыв пользователя сбрасывает его '
+            'рекомендации.'
+        )
+
+    def test_03_cache_expires(self, settings, user_client, titles):
+        settings.TITLES_CACHE = {
+            'BACKEND': 'api.cache.LocMemLRUCache',
+            'OPTIONS': {'TIMEOUT': None},
+        }
+        settings.RECOMMENDATIONS_CACHE_TIMEOUT = 0
+        assert recommendations(user_client)
+        SimilarTitle.objects.all().delete()
+        assert recommendations(user_client) == [], (
+            'Проверьте, что рекомендации хранятся в кэше не дольше '
+            '`RECOMMENDATIONS_CACHE_TIMEOUT`, даже если у кэша нет '
+            '`TIMEOUT`.'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_04_constant_queries(user, user_client):
+    count = int(100000 * BENCHMARK_SCALE)
+    generator = np.random.default_rng(0)
+    title_ids = [
+        title.pk for title in Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000)
+            for idx in range(count)
+        )
+    ]
+    similar = generator.choice(title_ids, (count, 10)).tolist()
+    scores = generator.random((count, 10)).tolist()
+    SimilarTitle.objects.bulk_create(
+        (
+            SimilarTitle(title_id=title_id, similar_id=other, score=score)
+            for title_id, row, row_scores in zip(title_ids, similar, scores)
+            for other, score in dict(zip(row, row_scores)).items()
+            if other != title_id
+        ),
+        batch_size=1000
+    )
+    Review.objects.bulk_create(
+        Review(title_id=title_id, author=user, text='text', score=score)
+        for title_id, score in zip(
+            generator.choice(title_ids, 200, replace=False).tolist(),
+            generator.integers(1, 11, 200).tolist()
+        )
+    )
+    get_response_cache().clear()
+    with CaptureQueriesContext(connection) as context:
+        response = user_client.get(URL)
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()) == 20
+    assert len(context.captured_queries) <= 5, (
+        f'Проверьте, что `{URL}` выполняет постоянное число запросов '
+        'к БД, независимо от числа отзывов пользователя и похожих '
+        'произведений.'
+    )
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import override_settings
+
+from reviews import bitmaps
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def titles():
+    genres = {
+        genre.slug: genre for genre in Genre.objects.bulk_create(
+            Genre(name=name, slug=slug)
+            for name, slug in (('Драма', 'drama'), ('Комедия', 'comedy'))
+        )
+    }
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    titles = {}
+    for name, year, category, slugs in (
+        ('Драма', 1990, movie, ['drama']),
+        ('Комедия', 1995, book, ['comedy']),
+        ('Драмеди', 2005, movie, ['drama', 'comedy']),
+        ('Без жанра', 2010, None, []),
+    ):
+        titles[name] = Title.objects.create(
+            name=name, year=year, category=category
+        )
+        titles[name].genre.set(genres[slug] for slug in slugs)
+    return titles
+
+
+def names(client, query):
+    response = client.get(f'{URL}?{query}')
+    assert response.status_code == HTTPStatus.OK
+    return sorted(title['name'] for title in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitleBitmapFilters:
+
+    @pytest.mark.parametrize('indexed', (True, False))
+    @pytest.mark.parametrize('query, expected', (
+        ('genre=drama', ['Драма', 'Драмеди']),
+        ('genre=drama,comedy', ['Драма', 'Драмеди', 'Комедия']),
+        ('genre=drama,comedy&genre_match=all', ['Драмеди']),
+        ('genre=drama,unknown&genre_match=all', []),
+        ('category=movie&genre=comedy', ['Драмеди']),
+        ('year_min=1995&year_max=2005', ['Драмеди', 'Комедия']),
+        ('year_min=2000', ['Без жанра', 'Драмеди']),
+        ('category=unknown', []),
+    ))
+    def test_01_filters(self, client, titles, indexed, query, expected):
+        with override_settings(TITLE_BITMAP_INDEX=indexed):
+            assert names(client, query) == expected, (
+                f'Проверьте фильтрацию `{URL}?{query}`.'
+            )
+
+    def test_02_index_follows_changes(self, client, titles):
+        assert names(client, 'genre=comedy') == ['Драмеди', 'Комедия']
+        index = bitmaps.get_title_index()
+        titles['Драма'].genre.add(Genre.objects.get(slug='comedy'))
+        titles['Комедия'].delete()
+        title = titles['Без жанра']
+        title.year = 1980
+        title.save()
+        assert bitmaps.get_title_index() is index, (
+            'Проверьте, что индекс обновляется без полной пересборки.'
+        )
+        assert names(client, 'genre=comedy') == ['Драма', 'Драмеди']
+        assert names(client, 'year_max=1990') == ['Без жанра', 'Драма']
+        Genre.objects.filter(slug='comedy').update(slug='humor')
+        Genre.objects.get(slug='humor').save()
+        assert names(client, 'genre=humor') == ['Драма', 'Драмеди']
+
+    def test_03_many_candidates(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=2000)
+            for idx in range(40000)
+        )
+        response = client.get(f'{URL}?year_min=2000&limit=1')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 40000, (
+            'Проверьте, что фильтр по индексу работает для любого числа '
+            'подходящих произведений.'
+        )
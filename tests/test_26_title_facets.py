@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import get_response_cache
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+TITLES = 300
+
+
+@pytest.fixture
+def titles():
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    for name, year, category, genres in (
+        ('Драма', 1990, movie, [drama]),
+        ('Комедия', 1995, None, [comedy]),
+        ('Драмеди', 2005, movie, [drama, comedy]),
+        ('Ещё драма', 2010, movie, [drama]),
+    ):
+        Title.objects.create(
+            name=name, year=year, category=category
+        ).genre.set(genres)
+
+
+def facets(client, query):
+    response = client.get(f'{URL}?{query}')
+    assert response.status_code == HTTPStatus.OK
+    return response.json()['facets']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TitleFacets:
+
+    @pytest.mark.parametrize('indexed', (True, False))
+    def test_01_facets(self, client, titles, indexed):
+        with override_settings(TITLE_BITMAP_INDEX=indexed):
+            data = facets(client, 'facets=genre,category,year')
+            assert data == {
+                'genre': [
+                    {'name': 'Драма', 'slug': 'drama', 'count': 3},
+                    {'name': 'Комедия', 'slug': 'comedy', 'count': 2},
+                ],
+                'category': [
+                    {'name': 'Фильм', 'slug': 'movie', 'count': 3},
+                ],
+                'year': [
+                    {'decade': 1990, 'count': 2},
+                    {'decade': 2000, 'count': 1},
+                    {'decade': 2010, 'count': 1},
+                ],
+            }, (
+                'Проверьте, что `facets` возвращает число произведений '
+                'в каждом жанре, категории и десятилетии.'
+            )
+            assert facets(client, 'facets=year&genre=comedy') == {'year': [
+                {'decade': 1990, 'count': 1}, {'decade': 2000, 'count': 1},
+            ]}, 'Проверьте, что фасеты учитывают фильтры запроса.'
+            assert facets(client, 'facets=genre&name=Драма') == {'genre': [
+                {'name': 'Драма', 'slug': 'drama', 'count': 1},
+            ]}
+
+    def test_02_invalid_facet(self, client, titles):
+        response = client.get(f'{URL}?facets=genre,rating')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'facets' not in client.get(URL).json()
+
+    def test_03_no_extra_queries(self, client):
+        genres = Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre{idx}') for idx in range(20)
+        )
+        titles = Title.objects.bulk_create(
+            Title(name=f'Произведение {idx}', year=1900 + idx % 120)
+            for idx in range(TITLES)
+        )
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title=title, genre=genres[idx % 20])
+            for idx, title in enumerate(titles)
+        )
+        queries = {}
+        for query in ('year_min=1900', 'year_min=1900&facets=genre,year'):
+            get_response_cache().clear()
+            client.get(f'{URL}?{query}')
+            get_response_cache().clear()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(f'{URL}?{query}')
+            assert response.status_code == HTTPStatus.OK
+            queries[query] = [
+                captured['sql'] for captured in context.captured_queries
+            ]
+        plain, faceted = queries.values()
+        assert sum(
+            bucket['count'] for bucket in response.json()['facets']['genre']
+        ) == TITLES
+        assert faceted == plain, (
+            'Проверьте, что фасеты считаются по битовому индексу '
+            'без дополнительных запросов к БД.'
+        )
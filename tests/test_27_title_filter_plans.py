@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+from django.test import override_settings
+
+from api.filters import TitleFilter
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+TITLES = 5000
+CATEGORIES = 50
+
+
+@pytest.fixture
+def catalogue():
+    categories = Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'category{idx}')
+        for idx in range(CATEGORIES)
+    )
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre{idx}') for idx in range(20)
+    )
+    titles = Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx}',
+            year=1900 + idx % 120,
+            category=categories[idx % CATEGORIES]
+        )
+        for idx in range(TITLES)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genres[idx % 20])
+        for idx, title in enumerate(titles)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return titles
+
+
+def filtered(query):
+    return TitleFilter(QueryDict(query), Title.objects.order_by()).qs
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Планы запросов SQLite'
+)
+@pytest.mark.django_db(transaction=True)
+class Test27TitleFilterPlans:
+
+    @pytest.fixture(autouse=True)
+    def without_bitmap_index(self, settings):
+        settings.TITLE_BITMAP_INDEX = False
+
+    @pytest.mark.parametrize('query, expected', (
+        ('year_min=1950&year_max=1960', 'title_year_idx (year>? AND year<?)'),
+        ('year_min=2000', 'title_year_idx (year>?)'),
+        ('category=category1,category2', '(category_id=?)'),
+        ('ids=1,2,3', 'INTEGER PRIMARY KEY (rowid=?)'),
+        ('genre=genre1,genre2', 'INTEGER PRIMARY KEY (rowid=?)'),
+    ))
+    def test_01_index_friendly(self, catalogue, query, expected):
+        queryset = filtered(query)
+        plan = queryset.explain()
+        assert 'SEARCH reviews_title USING ' in plan and expected in plan, (
+            f'Проверьте, что фильтр `{query}` читает произведения '
+            f'по индексу. План запроса:\n{plan}'
+        )
+        assert 'SCAN reviews_title' not in plan
+        assert ' OR ' not in str(queryset.query), (
+            f'Проверьте, что фильтр `{query}` не строится из условий OR.'
+        )
+
+    @pytest.mark.parametrize('indexed', (True, False))
+    def test_02_multi_value_filters(self, client, catalogue, indexed):
+        ids = [title.pk for title in catalogue[:3]]
+        with override_settings(TITLE_BITMAP_INDEX=indexed):
+            response = client.get(
+                f'{URL}?ids={",".join(map(str, ids))}&limit=10'
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert sorted(
+                title['id'] for title in response.json()['results']
+            ) == ids
+            for value in ('1.5', '1,x'):
+                response = client.get(f'{URL}?ids={value}')
+                assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                    'Проверьте, что `ids` принимает только целые числа.'
+                )
+            response = client.get(
+                f'{URL}?category=category1,category2&year_max=1910'
+            )
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['count'] == len([
+                title for title in catalogue
+                if title.category.slug in ('category1', 'category2')
+                and title.year <= 1910
+            ]) > 0
@@ -150,6 +150,16 @@ def check_permissions(client, url, data, user_role, objects,
     )
 
 
+def create_authors(count, prefix='author'):
+    """Создать `count` пользователей напрямую в БД, одним запросом."""
+    from reviews.models import User
+
+    return User.objects.bulk_create(
+        User(username=f'{prefix}{idx}', email=f'{prefix}{idx}@yamdb.fake')
+        for idx in range(count)
+    )
+
+
 def create_single_review(client, title_id, text, score):
     data = {'text': text, 'score': score}
     response = client.post(